@@ -0,0 +1,239 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pandas as pd
+from datetime import datetime, timezone, timedelta
+import logging
+import io
+import os
+from marystore import SCHEMA, COLUMNS, resolve, read_markers, mark_complete
+from maryindex import CsvIndex, csv_lock
+
+# Rollup levels kept next to the raw rows: level name -> bucket size
+ROLLUPS = {"5m": "5min", "1h": "1h", "1d": "1D"}
+ROLLUP_SCHEMA = pa.schema([
+    ("Timestamp", pa.timestamp("us", tz="UTC")),
+    ("Exchange", pa.string()),
+    ("Symbol", pa.string()),
+    ("Open", pa.float64()),
+    ("High", pa.float64()),
+    ("Low", pa.float64()),
+    ("Close", pa.float64()),
+    ("Mean", pa.float64()),
+    ("Samples", pa.int32()),
+    ("Average Momentum", pa.float64()),
+])
+
+def rollup(df, freq):
+    # OHLC of each symbol's Momentum Score per `freq` bucket, plus its mean, sample count and mean Average Momentum
+    df = df.sort_values('Timestamp', kind='stable')
+    grouped = df.groupby([df['Timestamp'].dt.floor(freq), 'Exchange', 'Symbol'])
+    bars = grouped['Momentum Score'].agg(Open='first', High='max', Low='min', Close='last', Mean='mean', Samples='size')
+    bars['Average Momentum'] = grouped['Average Momentum'].mean()
+    return bars.reset_index()
+
+def coarsen(bars, freq=None):
+    # Fold bars into `freq` buckets, or with no `freq` merge bars that share a bucket; earlier bars come first
+    bars = bars.sort_values('Timestamp', kind='stable').assign(
+        Total=bars['Mean'] * bars['Samples'],
+        AverageTotal=bars['Average Momentum'] * bars['Samples'],
+        AverageSamples=bars['Samples'].where(bars['Average Momentum'].notna(), 0),
+    )
+    key = bars['Timestamp'].dt.floor(freq) if freq else bars['Timestamp']
+    merged = bars.groupby([key, 'Exchange', 'Symbol'], sort=True).agg(
+        Open=('Open', 'first'), High=('High', 'max'), Low=('Low', 'min'), Close=('Close', 'last'),
+        Total=('Total', 'sum'), Samples=('Samples', 'sum'), AverageTotal=('AverageTotal', 'sum'), AverageSamples=('AverageSamples', 'sum')
+    )
+    merged['Mean'] = merged['Total'] / merged['Samples']
+    merged['Average Momentum'] = merged['AverageTotal'] / merged['AverageSamples'].where(merged['AverageSamples'] > 0)
+    return merged.reset_index()[ROLLUP_SCHEMA.names]
+
+class Archive:
+    """Compressed history of the momentum scores that have aged out of the live CSV or store.
+
+    Every day gets one zstd-compressed Parquet file per level, <directory>/<level>/YYYY-MM-DD.parquet:
+    "raw" holds the rows that left the live data, "5m", "1h" and "1d" OHLC bars of each symbol's
+    Momentum Score. Bars are rolled up as soon as an hour is over, long before its rows age out,
+    so long-range readers find them precomputed. prune() deletes each level's days once they
+    are older than its retention (None keeps them forever), so disk use stays bounded over months.
+    """
+
+    def __init__(self, directory, retention=None):
+        self.directory = directory
+        self.retention = retention or {}
+
+    def path(self, level, day):
+        return os.path.join(self.directory, level, f"{day:%Y-%m-%d}.parquet")
+
+    def write_file(self, table, path):
+        # Write-then-rename so a reader never opens a half-written file
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        pq.write_table(table, f"{path}.tmp", compression="zstd")
+        os.replace(f"{path}.tmp", path)
+
+    def read_file(self, path, schema):
+        if not os.path.exists(path):
+            return schema.empty_table().to_pandas()
+        return pq.read_table(path, schema=schema).to_pandas()
+
+    def add(self, df):
+        # Merge complete rows, whole hours of them, into their days' raw files and roll them up
+        df = df.assign(Timestamp=pd.to_datetime(df['Timestamp'], utc=True, format='ISO8601'), Complete=True)
+        for day, day_df in df.groupby(df['Timestamp'].dt.floor('D')):
+            path = self.path("raw", day)
+            day_df = resolve(pd.concat([self.read_file(path, SCHEMA), day_df[COLUMNS]], ignore_index=True))
+            self.write_file(pa.Table.from_pandas(day_df, schema=SCHEMA, preserve_index=False), path)
+        self.roll(df)
+
+    def roll(self, df):
+        # Replace the 5m and 1h bars of every hour `df` covers, which must hold all of each hour's
+        # complete rows, then rebuild those days' 1d bars from their 1h bars. Rolling an hour twice is harmless.
+        df = df.assign(Timestamp=pd.to_datetime(df['Timestamp'], utc=True, format='ISO8601'))
+        for day, day_df in df.groupby(df['Timestamp'].dt.floor('D')):
+            hours = day_df['Timestamp'].dt.floor('h').unique()
+            for level in ("5m", "1h"):
+                path = self.path(level, day)
+                bars = self.read_file(path, ROLLUP_SCHEMA)
+                bars = pd.concat([bars[~bars['Timestamp'].dt.floor('h').isin(hours)], rollup(day_df, ROLLUPS[level])], ignore_index=True)
+                bars = bars.sort_values(['Timestamp', 'Symbol'], kind='stable')
+                self.write_file(pa.Table.from_pandas(bars, schema=ROLLUP_SCHEMA, preserve_index=False), path)
+            daily = coarsen(self.read_file(self.path("1h", day), ROLLUP_SCHEMA), ROLLUPS["1d"])
+            self.write_file(pa.Table.from_pandas(daily, schema=ROLLUP_SCHEMA, preserve_index=False), self.path("1d", day))
+
+    def rolled_until(self):
+        # End of the newest rolled-up hour, or None before anything is rolled up
+        days = self.days("1h")
+        if not days:
+            return None
+        timestamps = pq.read_table(days[-1][1], columns=['Timestamp'], schema=ROLLUP_SCHEMA).column('Timestamp').to_pandas()
+        return timestamps.max() + pd.Timedelta(hours=1) if len(timestamps) else days[-1][0]
+
+    def archived_until(self):
+        # Newest row that has left the live data, or None before any has
+        days = self.days("raw")
+        if not days:
+            return None
+        timestamps = pq.read_table(days[-1][1], columns=['Timestamp'], schema=SCHEMA).column('Timestamp').to_pandas()
+        return timestamps.max() if len(timestamps) else days[-1][0]
+
+    def days(self, level, start=None, end=None):
+        # (day, path) of every archived day of `level` overlapping [start, end)
+        level_path = os.path.join(self.directory, level)
+        if not os.path.isdir(level_path):
+            return []
+        found = []
+        for name in sorted(os.listdir(level_path)):
+            if not name.endswith(".parquet"):
+                continue
+            day = datetime.strptime(name[:10], "%Y-%m-%d").replace(tzinfo=timezone.utc)
+            if (start is not None and day + timedelta(days=1) <= start) or (end is not None and day >= end):
+                continue
+            found.append((day, os.path.join(level_path, name)))
+        return found
+
+    def oldest(self, level):
+        days = self.days(level)
+        return days[0][0] if days else None
+
+    def read(self, level, start=None, end=None, symbols=None, exchange=None, columns=None):
+        # Rows (raw) or bars (5m, 1h, 1d) with start <= Timestamp < end, optionally for some symbols and one exchange
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+        schema = SCHEMA if level == "raw" else ROLLUP_SCHEMA
+        filters = []
+        if start is not None:
+            filters.append(("Timestamp", ">=", start))
+        if end is not None:
+            filters.append(("Timestamp", "<", end))
+        if symbols is not None:
+            filters.append(("Symbol", "in", list(symbols)))
+        if exchange is not None:
+            filters.append(("Exchange", "==", exchange))
+        tables = [pq.read_table(path, columns=columns, filters=filters or None, schema=schema) for day, path in self.days(level, start, end)]
+        if not tables:
+            return schema.empty_table().to_pandas()[columns or schema.names]
+        return pa.concat_tables(tables).to_pandas()
+
+    def averages(self, level, start=None, end=None, exchange=None):
+        # Market average per cycle (raw) or bar, with the number of cycles behind it
+        if level == "raw":
+            df = self.read(level, start, end, exchange=exchange, columns=['Timestamp', 'Momentum Score'])
+            return df.groupby('Timestamp')['Momentum Score'].agg(['mean', 'size']).set_axis(['Momentum Score', 'Samples'], axis=1).reset_index()
+        df = self.read(level, start, end, exchange=exchange, columns=['Timestamp', 'Samples', 'Average Momentum'])
+        df['Total'] = df['Average Momentum'] * df['Samples']
+        grouped = df.groupby('Timestamp')
+        # A symbol present in every cycle of the bar has as many samples as the bar has cycles
+        return pd.DataFrame({
+            'Momentum Score': grouped['Total'].sum() / grouped['Samples'].sum(),
+            'Samples': grouped['Samples'].max(),
+        }).reset_index()
+
+    def prune(self, now):
+        for level, keep in self.retention.items():
+            if keep is None:
+                continue
+            for day, path in self.days(level, end=now - keep - timedelta(days=1)):
+                os.remove(path)
+                logging.info(f"Dropped archived {level} scores for {day:%Y-%m-%d}")
+
+def archive_csv(csv_path, archive, before, cycles_path=None, default_exchange="BYBIT"):
+    # Move the complete rows older than `before` from the CSV into the archive and rewrite the CSV without
+    # them; rows of cycles that never completed are dropped. Returns how many rows left the CSV.
+    with csv_lock(csv_path, exclusive=True):
+        if not os.path.exists(csv_path):
+            return 0
+        with open(csv_path, 'rb') as f:
+            header = f.readline()
+            lines = f.read().splitlines(keepends=True)
+        if not lines:
+            return 0
+        df = pd.read_csv(io.BytesIO(header + b"".join(lines)))
+        old = (pd.to_datetime(df['Timestamp'], utc=True, format='ISO8601') < before).to_numpy()
+        if not old.any():
+            return 0
+        markers = read_markers(cycles_path)
+        old_df = mark_complete(df[old].copy(), markers, default_exchange)
+        archive.add(old_df[old_df['Complete']])
+        if not old_df['Complete'].all():
+            logging.warning(f"Dropped {int((~old_df['Complete']).sum())} rows of cycles that never completed")
+
+        # Keep the newer lines byte for byte
+        with open(f"{csv_path}.tmp", 'wb') as f:
+            f.write(header)
+            f.writelines(line for line, is_old in zip(lines, old) if not is_old)
+        os.replace(f"{csv_path}.tmp", csv_path)
+
+    # Markers are only appended by the merger, which is what runs this
+    if markers is not None:
+        cycles_df = pd.read_csv(cycles_path)
+        cycles_df = cycles_df[pd.to_datetime(cycles_df['Timestamp'], utc=True, format='ISO8601') >= before]
+        cycles_df.to_csv(f"{cycles_path}.tmp", index=False)
+        os.replace(f"{cycles_path}.tmp", cycles_path)
+    return int(old.sum())
+
+def roll_csv(csv_path, archive, start, end, cycles_path=None, default_exchange="BYBIT"):
+    # Roll the complete CSV rows of the whole hours in [start, end) up into the archive's bars
+    df = CsvIndex(csv_path).read(start, end)
+    if df is None:
+        df = pd.read_csv(csv_path)
+        timestamps = pd.to_datetime(df['Timestamp'], utc=True, format='ISO8601')
+        df = df[(timestamps >= start) & (timestamps < end)].copy()
+    df = mark_complete(df, read_markers(cycles_path), default_exchange)
+    archive.roll(df[df['Complete']])
+
+def roll_store(store, archive, start, end):
+    # Roll the complete rows of the whole hours in [start, end) of a PartitionedStore or SqlStore up into the archive's bars
+    df = store.read(start, end)
+    archive.roll(df[df['Complete']])
+
+def archive_store(store, archive, before):
+    # Move the complete rows older than `before` from a PartitionedStore or SqlStore into the archive;
+    # rows of cycles that never completed are dropped. Returns how many rows were archived.
+    df = store.read(end=before)
+    if df.empty:
+        return 0
+    complete = df[df['Complete']]
+    archive.add(complete)
+    if len(complete) < len(df):
+        logging.warning(f"Dropped {len(df) - len(complete)} rows of cycles that never completed")
+    store.drop(before)
+    return len(complete)
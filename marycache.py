@@ -0,0 +1,257 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+import threading
+import logging
+import sqlite3
+import json
+import time
+import sys
+
+# Recommendation codes; each code is also the rating's contribution to the momentum score
+RATING_CODES = {'STRONG_BUY': 2, 'BUY': 1, 'NEUTRAL': 0, 'SELL': -1, 'STRONG_SELL': -2}
+RATING_NAMES = {code: name for name, code in RATING_CODES.items()}
+
+class Rating:
+    """Compact record of the parts of a TradingView Analysis summary we keep, and when it was fetched."""
+
+    __slots__ = ('code', 'buy', 'sell', 'neutral', 'fetched_at')
+
+    def __init__(self, code, buy=0, sell=0, neutral=0, fetched_at=None):
+        self.code = code
+        self.buy = buy
+        self.sell = sell
+        self.neutral = neutral
+        self.fetched_at = time.time() if fetched_at is None else fetched_at
+
+    @classmethod
+    def from_analysis(cls, analysis):
+        if analysis is None:
+            return None
+        summary = analysis.summary
+        return cls(
+            RATING_CODES.get(summary['RECOMMENDATION'].upper(), 0),
+            summary.get('BUY', 0),
+            summary.get('SELL', 0),
+            summary.get('NEUTRAL', 0)
+        )
+
+    @classmethod
+    def from_list(cls, values):
+        return cls(*values)
+
+    def to_list(self):
+        return [self.code, self.buy, self.sell, self.neutral, self.fetched_at]
+
+    @property
+    def recommendation(self):
+        return RATING_NAMES[self.code]
+
+    def __repr__(self):
+        return f"Rating({self.recommendation}, buy={self.buy}, sell={self.sell}, neutral={self.neutral})"
+
+class RatingCache:
+    """Thread-safe LRU cache of Rating records with soft and hard TTLs and hit/miss/eviction counters.
+
+    A record is fresh until its soft TTL (`ttl`) runs out, then stale until its hard TTL
+    (`stale_ttl`, by default the same) does, when it is dropped. Both can be set per key.
+    Size it to hold a whole cycle (symbols x intervals) so it never evicts its own entries.
+    """
+
+    def __init__(self, maxsize, ttl, stale_ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = ttl if stale_ttl is None else stale_ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def lookup(self, key, fresh_after=None):
+        # (record, True) while fresh; (record, False) while stale, i.e. past its soft TTL or
+        # fetched before `fresh_after` (epoch seconds) but within its hard TTL; else (None, False)
+        with self.lock:
+            now = time.monotonic()
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] <= now:
+                del self.entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None, False
+            self.entries.move_to_end(key)
+            soft_expires, hard_expires, record = entry
+            if soft_expires <= now or (fresh_after is not None and record.fetched_at < fresh_after):
+                self.stale_hits += 1
+                return record, False
+            self.hits += 1
+            return record, True
+
+    def get(self, key, fresh_after=None):
+        record, fresh = self.lookup(key, fresh_after)
+        return record if fresh else None
+
+    def set(self, key, record, ttl=None, stale_ttl=None):
+        now = time.monotonic()
+        hard_expires = now + (self.stale_ttl if stale_ttl is None else stale_ttl)
+        soft_expires = min(now + (self.ttl if ttl is None else ttl), hard_expires)
+        with self.lock:
+            self.entries[key] = (soft_expires, hard_expires, record)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def hit_rate(self):
+        # Share of lookups answered with a fresh record
+        lookups = self.hits + self.stale_hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def memory_usage(self):
+        # Approximate bytes held by the cache's keys, entries and records
+        with self.lock:
+            total = sys.getsizeof(self.entries)
+            for key, entry in self.entries.items():
+                total += sys.getsizeof(key) + sys.getsizeof(entry) + sys.getsizeof(entry[2])
+            return total
+
+    def stats(self):
+        return {
+            'size': len(self.entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'hit_rate': self.hit_rate(),
+        }
+
+class Revalidator:
+    """Refreshes stale cache keys on a small background thread pool.
+
+    Keys already being refreshed are not submitted again, and a caller that needs one of
+    them right away can wait for the refresh in flight instead of making its own request.
+    """
+
+    def __init__(self, max_workers=4):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="revalidate")
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        self.started = 0
+        self.coalesced = 0
+        self.waited = 0
+
+    def submit(self, keys, refresh):
+        # Call refresh(keys) in the background with those of `keys` not already in flight
+        with self.lock:
+            new_keys = [key for key in keys if key not in self.in_flight]
+            self.coalesced += len(keys) - len(new_keys)
+            if not new_keys:
+                return None
+            self.started += 1
+            future = self.executor.submit(self.run, new_keys, refresh)
+            for key in new_keys:
+                self.in_flight[key] = future
+        return future
+
+    def run(self, keys, refresh):
+        try:
+            refresh(keys)
+        except Exception as e:
+            logging.error(f"Background refresh of {len(keys)} keys failed: {str(e)}")
+        finally:
+            with self.lock:
+                for key in keys:
+                    self.in_flight.pop(key, None)
+
+    def wait_for(self, keys, timeout):
+        # Wait for the refreshes in flight for any of `keys`; returns the keys that had one
+        with self.lock:
+            pending = {key: self.in_flight[key] for key in keys if key in self.in_flight}
+            self.waited += len(pending)
+        if pending:
+            wait(set(pending.values()), timeout=timeout)
+        return set(pending)
+
+class PersistentCache:
+    """SQLite-backed cache shared by every fetcher process and kept across restarts.
+
+    Values are stored as JSON with their fetch time and an expiry, one table per kind of value.
+    Any SQLite error is logged and treated as a miss, so a locked or broken file never stops a fetch.
+    """
+
+    def __init__(self, path, ttl, table="ratings"):
+        self.path = path
+        self.ttl = ttl
+        self.table = table
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.connection().execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            f"fetched_at REAL NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def connection(self):
+        # sqlite3 connections cannot be shared between threads, so each thread opens its own
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def get(self, key, fresh_after=None):
+        try:
+            row = self.connection().execute(
+                f"SELECT value, fetched_at FROM {self.table} WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+        except sqlite3.Error as e:
+            logging.warning(f"Persistent cache read failed for {key}: {str(e)}")
+            row = None
+        if row is None or (fresh_after is not None and row[1] < fresh_after):
+            with self.lock:
+                self.misses += 1
+            return None
+        with self.lock:
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key, value, fetched_at=None):
+        self.set_many([(key, value)], fetched_at)
+
+    def set_many(self, items, fetched_at=None):
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        rows = [(key, json.dumps(value), fetched_at, fetched_at + self.ttl) for key, value in items]
+        conn = self.connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, fetched_at, expires_at) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            logging.warning(f"Persistent cache write of {len(rows)} entries failed: {str(e)}")
+
+    def purge_expired(self):
+        try:
+            self.connection().execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),))
+        except sqlite3.Error as e:
+            logging.warning(f"Persistent cache purge failed: {str(e)}")
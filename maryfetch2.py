@@ -1,68 +1,136 @@
 import pandas as pd
 import numpy as np
-from tradingview_ta import TA_Handler, Interval
+from tradingview_ta import Interval
 from datetime import datetime, timezone, timedelta
 import time
 import logging
-from cachetools import TTLCache
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+from functools import partial
+import threading
 import os
+from maryschedule import PriorityScheduler, bar_close, next_boundary, sleep_until, shed_order
+from collections import Counter
+from marycache import Rating, RatingCache, PersistentCache, Revalidator
+from marylimits import CircuitBreaker, AdaptiveRateLimiter, is_throttled
+from maryscore import rating_matrix, count_matrix, weight_matrix, score_matrix
+from marysnapshots import SnapshotStore
+from marystore import PartitionedStore, migrate_csv
+from marysql import SqlStore
+from maryring import ScoreRing
+from maryindex import CsvIndex
+from maryarchive import Archive, archive_csv, archive_store, roll_csv, roll_store, csv_lock
+from marysummary import SummaryTable, summarize
+from marysymbols import SYMBOLS
+from marymetrics import Metrics
+from marytransport import ScannerTransport
+from maryshard import ShardCoordinator, merge as merge_shards
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Set up caching
-cache = TTLCache(maxsize=1000, ttl=300)  # Cache with 5-minute TTL
+# Cadence settings: cycles start on wall-clock multiples of CYCLE_PERIOD
+CYCLE_PERIOD = 60  # Seconds between cycle starts
+WRITE_MARGIN = 5  # Seconds kept free at the end of each period for scoring and writing
+
+# Concurrency settings
+MAX_WORKERS = 16  # Maximum number of TradingView requests in flight
+CYCLE_DEADLINE = 45  # Seconds a cycle may spend fetching before the rest is skipped
+REQUEST_TIMEOUT = 10  # Seconds before a single request is abandoned
+
+# Fetch mode: "batch" asks the scanner for BATCH_SIZE symbols per request,
+# "single" makes one request per symbol/interval
+FETCH_MODE = "batch"
+BATCH_SIZE = 100
+
+# Keep-alive connection pool shared by every fetch thread
+transport = ScannerTransport(pool_size=MAX_WORKERS)
+
+# Request pacing: the rate halves on 429s/timeouts and recovers on success
+MAX_REQUEST_RATE = 50  # Requests per second
+RATE_LIMIT_WAIT = 5  # Seconds a request may wait for a slot before it is skipped for this cycle
+rate_limiter = AdaptiveRateLimiter(MAX_REQUEST_RATE)
+
+# Symbol/intervals that keep failing are skipped with exponential backoff
+breaker = CircuitBreaker(threshold=3, base_delay=60, max_delay=6 * 60 * 60)
+
+# Number of HTTP requests made in the current cycle
+request_count = 0
+request_count_lock = threading.Lock()
+
+# Ratings served from the scheduler's held values since start, without consulting the caches
+held_count = 0
+held_count_lock = threading.Lock()
+
+# Storage backend: "parquet" keeps the rows in hourly Parquet partitions under STORE_PATH, so
+# readers only open the hours they ask for; "sql" bulk-inserts them into an indexed table at
+# STORE_URL (any SQLAlchemy URL); "csv" appends to CSV_FILE_PATH as before.
+# An existing CSV is migrated into an empty store on startup (see migrate_existing_csv); to copy it
+# into one that already has rows, use `python marystore.py migrate [csv] [directory or URL]`.
+STORAGE_BACKEND = "parquet"
+STORE_PATH = "momentum_store"
+STORE_URL = "sqlite:///momentum_scores.db"
+STREAM_FLUSH = 5  # Seconds streamed rows are gathered into one partial Parquet file
 
 # CSV file path
 CSV_FILE_PATH = "momentum_scores.csv"
+CSV_COLUMNS = ["Symbol", "Momentum Score", "Timestamp", "Average Momentum", "Exchange", "Cycle"]
 
-symbols = [
-    "10000LADYSUSDT.P", "10000NFTUSDT.P", "1000BONKUSDT.P", "1000BTTUSDT.P", 
-    "1000FLOKIUSDT.P", "1000LUNCUSDT.P", "1000PEPEUSDT.P", "1000XECUSDT.P", 
-    "1INCHUSDT.P", "AAVEUSDT.P", "ACHUSDT.P", "ADAUSDT.P", "AGLDUSDT.P", 
-    "AKROUSDT.P", "ALGOUSDT.P", "ALICEUSDT.P", "ALPACAUSDT.P", 
-    "ALPHAUSDT.P", "AMBUSDT.P", "ANKRUSDT.P", "ANTUSDT.P", 
-    "APEUSDT.P", "API3USDT.P", "APTUSDT.P", "ARUSDT.P", "ARBUSDT.P", "ARKUSDT.P", 
-    "ARKMUSDT.P", "ARPAUSDT.P", "ASTRUSDT.P", "ATAUSDT.P", "ATOMUSDT.P", 
-    "AUCTIONUSDT.P", "AUDIOUSDT.P", "AVAXUSDT.P", "AXSUSDT.P", "BADGERUSDT.P", 
-    "BAKEUSDT.P", "BALUSDT.P", "BANDUSDT.P", "BATUSDT.P", "BCHUSDT.P", 
-    "BELUSDT.P", "BICOUSDT.P", "BIGTIMEUSDT.P", "BLURUSDT.P", "BLZUSDT.P",
-    "BTCUSDT.P", "C98USDT.P", "CEEKUSDT.P", "CELOUSDT.P", "CELRUSDT.P", "CFXUSDT.P",
-    "CHRUSDT.P", "CHZUSDT.P", "CKBUSDT.P", "COMBOUSDT.P", "COMPUSDT.P",
-    "COREUSDT.P", "COTIUSDT.P", "CROUSDT.P", "CRVUSDT.P", "CTCUSDT.P",
-    "CTKUSDT.P", "CTSIUSDT.P", "CVCUSDT.P", "CVXUSDT.P", "CYBERUSDT.P", "DARUSDT.P",
-    "DASHUSDT.P", "DENTUSDT.P", "DGBUSDT.P", "DODOUSDT.P", "DOGEUSDT.P", "DOTUSDT.P",
-    "DUSKUSDT.P", "DYDXUSDT.P", "EDUUSDT.P", "EGLDUSDT.P", "ENJUSDT.P", "ENSUSDT.P",
-    "EOSUSDT.P", "ETCUSDT.P", "ETHUSDT.P", "ETHWUSDT.P", "FILUSDT.P",
-    "FITFIUSDT.P", "FLOWUSDT.P", "FLRUSDT.P", "FORTHUSDT.P", "FRONTUSDT.P", "FTMUSDT.P",
-    "FXSUSDT.P", "GALAUSDT.P", "GFTUSDT.P", "GLMUSDT.P",
-    "GLMRUSDT.P", "GMTUSDT.P", "GMXUSDT.P", "GRTUSDT.P", "GTCUSDT.P", "HBARUSDT.P", 
-    "HFTUSDT.P", "HIFIUSDT.P", "HIGHUSDT.P", "HNTUSDT.P",
-    "HOOKUSDT.P", "HOTUSDT.P", "ICPUSDT.P", "ICXUSDT.P", "IDUSDT.P", "IDEXUSDT.P",
-    "ILVUSDT.P", "IMXUSDT.P", "INJUSDT.P", "IOSTUSDT.P", "IOTAUSDT.P", "IOTXUSDT.P",
-    "JASMYUSDT.P", "JOEUSDT.P", "JSTUSDT.P", "KASUSDT.P", "KAVAUSDT.P", "KDAUSDT.P",
-    "KEYUSDT.P", "KLAYUSDT.P", "KNCUSDT.P", "KSMUSDT.P", "LDOUSDT.P", "LEVERUSDT.P",
-    "LINAUSDT.P", "LINKUSDT.P", "LITUSDT.P", "LOOKSUSDT.P", "LOOMUSDT.P", "LPTUSDT.P",
-    "LQTYUSDT.P", "LRCUSDT.P", "LTCUSDT.P", "LUNA2USDT.P", "MAGICUSDT.P",
-    "MANAUSDT.P", "MASKUSDT.P", "MATICUSDT.P", "MAVUSDT.P", "MDTUSDT.P",
-    "MINAUSDT.P", "MKRUSDT.P", "MNTUSDT.P", "MTLUSDT.P", "NEARUSDT.P",
-    "NEOUSDT.P", "NKNUSDT.P", "NMRUSDT.P", "NTRNUSDT.P", "OGUSDT.P",
-    "OGNUSDT.P", "OMGUSDT.P", "ONEUSDT.P", "ONTUSDT.P", "OPUSDT.P", "ORBSUSDT.P",
-    "ORDIUSDT.P", "OXTUSDT.P", "PAXGUSDT.P", "PENDLEUSDT.P", "PEOPLEUSDT.P", "PERPUSDT.P",
-    "PHBUSDT.P", "PROMUSDT.P", "QNTUSDT.P", "QTUMUSDT.P", "RADUSDT.P", "RDNTUSDT.P", 
-    "REEFUSDT.P", "RENUSDT.P", "REQUSDT.P", "RLCUSDT.P", "ROSEUSDT.P", 
-    "RPLUSDT.P", "RSRUSDT.P", "RSS3USDT.P", "RUNEUSDT.P", "RVNUSDT.P",
-    "SANDUSDT.P", "SCUSDT.P", "SCRTUSDT.P", "SEIUSDT.P", "SFPUSDT.P", "SHIB1000USDT.P",
-    "SKLUSDT.P", "SLPUSDT.P", "SNXUSDT.P", "SOLUSDT.P", "SPELLUSDT.P", "SSVUSDT.P", 
-    "STGUSDT.P", "STMXUSDT.P", "STORJUSDT.P", "STPTUSDT.P", "STXUSDT.P", "SUIUSDT.P", 
-    "SUNUSDT.P", "SUSHIUSDT.P", "SWEATUSDT.P", "SXPUSDT.P",
-    "TUSDT.P", "THETAUSDT.P", "TLMUSDT.P", "TOMIUSDT.P", "TONUSDT.P",
-    "TRBUSDT.P", "TRUUSDT.P", "TRXUSDT.P", "TWTUSDT.P", "UMAUSDT.P", "UNFIUSDT.P",
-    "UNIUSDT.P", "USDCUSDT.P", "VETUSDT.P", "VGXUSDT.P", "VRAUSDT.P",
-    "WAVESUSDT.P", "WAXPUSDT.P", "WLDUSDT.P", "WOOUSDT.P", "XCNUSDT.P",
-    "XEMUSDT.P", "XLMUSDT.P", "XMRUSDT.P", "XNOUSDT.P", "XRPUSDT.P", "XTZUSDT.P",
-    "XVGUSDT.P", "XVSUSDT.P", "YFIUSDT.P", "YGGUSDT.P", "ZECUSDT.P", "ZENUSDT.P", "ZILUSDT.P", "ZRXUSDT.P"
-]
+# Ingest mode: "stream" appends each symbol's row as soon as all of its intervals are in, leaving
+# Average Momentum blank; "cycle" holds the rows and writes the whole cycle at once.
+# Either way every row carries its cycle id (the cycle's start in epoch seconds), and a cycle
+# only counts as complete once its marker, with the cross-sectional Average Momentum, is in
+# CYCLES_FILE_PATH, or with the Parquet backend once its complete rows are written.
+INGEST_MODE = "stream"
+CYCLES_FILE_PATH = "momentum_cycles.csv"
+CYCLES_COLUMNS = ["Cycle", "Timestamp", "Exchange", "Symbols", "Average Momentum"]
+
+# One row per complete cycle and exchange with the cross-sectional mean, median, quantiles, breadth
+# and top and bottom symbols, written with every backend so dashboards need not aggregate the scores;
+# rows older than SUMMARY_RETENTION are dropped
+SUMMARY_PATH = "momentum_summary.csv"
+SUMMARY_RETENTION = timedelta(days=30)
+
+# Raw per-cycle rating snapshots written next to the CSV, so scores can be recomputed
+SNAPSHOT_PATH = "rating_snapshots"
+
+# Rolling RING_WINDOW seconds of scores, one int16 fixed-point row per cycle, in a memory-mapped
+# file the dashboards read in place
+RING_PATH = "momentum_ring.bin"
+RING_WINDOW = 24 * 3600
+
+# Retention: at the start of every RETENTION_PERIOD the merger rolls the finished hours of the last
+# ROLLUP_LOOKBACK up into 5-minute, 1-hour and 1-day OHLC bars of every symbol's score in ARCHIVE_PATH,
+# which long-range plots read instead of raw rows, and moves rows older than RAW_RETENTION out of the
+# CSV or store into the archive. There each day is kept as zstd-compressed Parquet, each level for as
+# long as ARCHIVE_RETENTION says (None keeps it forever).
+ARCHIVE_PATH = "momentum_archive"
+RAW_RETENTION = timedelta(days=7)
+ARCHIVE_RETENTION = {"raw": timedelta(days=30), "5m": timedelta(days=180), "1h": None, "1d": None}
+RETENTION_PERIOD = 3600
+ROLLUP_LOOKBACK = timedelta(hours=6)
+
+# Every running copy of this script claims a lease here and fetches its own shard of the symbols;
+# the lowest live lease merges the shards and writes the cycle
+SHARD_DIR = "shards"
+MERGE_MARGIN = 2  # Seconds before the next cycle by which the merger stops waiting for shards
+
+# Prometheus-style metrics, rewritten every cycle; set METRICS_PORT to also serve them locally.
+# Shard workers other than the first add their lease number to the file name and the port.
+METRICS_PATH = "maryfetch.prom"
+METRICS_PORT = None
+
+# On-disk cache shared by every fetcher process (and valenbot) across restarts
+CACHE_DB_PATH = "fetch_cache.sqlite"
+
+# Stale-while-revalidate: a rating older than CACHE_TTL is still served right away while a
+# background worker refetches it, until its bar closes or MAX_STALE seconds pass. A rating whose
+# refetches keep failing stops being scored MAX_STALE seconds after it was due at the latest.
+CACHE_TTL = 300
+MAX_STALE = 900
+REVALIDATE_WORKERS = 4
+
+# Every registered symbol
+symbols = list(SYMBOLS)
 
 # Configuration
 exchange = "BYBIT"
@@ -78,71 +146,667 @@ intervals = {
     Interval.INTERVAL_1_DAY: 0.1
 }
 
-def fetch_all_data(symbol, exchange, screener, interval):
+# Longest a rating may be held before it is refetched, even though its bar is still open.
+# Every interval is also refetched as soon as its bar closes.
+max_staleness = {
+    Interval.INTERVAL_1_MINUTE: 60,
+    Interval.INTERVAL_5_MINUTES: 300,
+    Interval.INTERVAL_15_MINUTES: 300,
+    Interval.INTERVAL_30_MINUTES: 600,
+    Interval.INTERVAL_1_HOUR: 600,
+    Interval.INTERVAL_2_HOURS: 900,
+    Interval.INTERVAL_4_HOURS: 900,
+    Interval.INTERVAL_1_DAY: 1800
+}
+
+# Adaptive refresh: after every cycle the PRIORITY_SHARE of symbols moving the most (score
+# volatility, rank change, closeness to the maryfilter thresholds or the average) are refetched
+# on HOT_SCALE times the staleness budget and the rest on COLD_SCALE times it, which keeps the
+# request volume about the same. COLD_SCALE times max_staleness is the refresh every symbol is guaranteed.
+PRIORITY_SHARE = 0.2
+HOT_SCALE = 1.0
+COLD_SCALE = 3.0
+PRIORITY_THRESHOLDS = (-0.4, -0.1, 0.1, 0.4)
+
+# Named interval-weight profiles, all scored in the same pass; "default" is the written Momentum Score
+weight_profiles = {
+    "default": intervals
+}
+
+# Fetch jobs, one per exchange/screener, each with its own symbols, intervals and weight profiles.
+# Jobs share the connection pool, the request rate budget and the caches; every exchange gets an
+# equal share of MAX_WORKERS, and every written row is tagged with its job's exchange.
+jobs = [
+    {"exchange": exchange, "screener": screener, "symbols": symbols, "intervals": intervals, "weight_profiles": weight_profiles},
+]
+
+def job_name(job):
+    return f"{job['exchange']}_{job['screener']}".lower()
+
+def snapshot_path(job):
+    # The first job keeps the original snapshot files, so its history carries on
+    return SNAPSHOT_PATH if job is jobs[0] else f"{SNAPSHOT_PATH}_{job_name(job)}"
+
+def ring_path(job):
+    stem, extension = os.path.splitext(RING_PATH)
+    return RING_PATH if job is jobs[0] else f"{stem}_{job_name(job)}{extension}"
+
+schedulers = {
+    job_name(job): PriorityScheduler(job.get("max_staleness", max_staleness), hot_share=PRIORITY_SHARE,
+                                     hot_scale=HOT_SCALE, cold_scale=COLD_SCALE, thresholds=PRIORITY_THRESHOLDS,
+                                     batch_size=BATCH_SIZE if FETCH_MODE == "batch" else None, max_age=MAX_STALE)
+    for job in jobs
+}
+snapshot_stores = {job_name(job): SnapshotStore(snapshot_path(job), job["symbols"], list(job["intervals"])) for job in jobs}
+rings = {job_name(job): ScoreRing(ring_path(job), job["symbols"], job["exchange"], CYCLE_PERIOD, RING_WINDOW) for job in jobs}
+coordinator = ShardCoordinator(SHARD_DIR)
+if STORAGE_BACKEND == "sql":
+    store = SqlStore(STORE_URL)
+elif STORAGE_BACKEND == "parquet":
+    store = PartitionedStore(STORE_PATH)
+else:
+    store = None
+csv_index = CsvIndex(CSV_FILE_PATH)
+archive = Archive(ARCHIVE_PATH, ARCHIVE_RETENTION)
+summary = SummaryTable(SUMMARY_PATH)
+
+# Set up caching, sized to hold a whole cycle of slim rating records, backed by the shared on-disk cache
+cache = RatingCache(maxsize=sum(len(job["symbols"]) * len(job["intervals"]) for job in jobs), ttl=CACHE_TTL, stale_ttl=MAX_STALE)
+shared_cache = PersistentCache(CACHE_DB_PATH, ttl=CACHE_TTL)
+revalidator = Revalidator(REVALIDATE_WORKERS)
+
+# Instrumentation
+metrics = Metrics()
+metrics.describe('maryfetch_requests_total', 'counter', 'TradingView requests made, by interval and kind (single or batch).')
+metrics.describe('maryfetch_request_seconds', 'histogram', 'TradingView request latency in seconds, by interval and kind.')
+metrics.describe('maryfetch_request_errors_total', 'counter', 'Failed TradingView requests, by interval, kind and reason.')
+metrics.describe('maryfetch_requests_shed_total', 'counter', 'Requests dropped at the cycle deadline, by interval.')
+metrics.describe('maryfetch_revalidations_total', 'counter', 'Background refreshes of stale ratings, by result (started, coalesced into one in flight, or waited for by a fetch).')
+metrics.describe('maryfetch_hot_symbols', 'gauge', 'Symbols currently refreshed on the shorter staleness budget, by job.')
+metrics.describe('maryfetch_cycle_seconds', 'histogram', 'Cycle wall time in seconds, by phase (fetch, merge, score, write, retention, total).')
+metrics.describe('maryfetch_cycle_requests', 'gauge', 'Requests made in the last cycle.')
+metrics.describe('maryfetch_cycles_total', 'counter', 'Cycles completed.')
+metrics.describe('maryfetch_cycle_errors_total', 'counter', 'Cycles aborted by an unexpected error.')
+metrics.describe('maryfetch_cache_lookups_total', 'counter', 'Rating cache lookups, by cache (memory or shared) and result.')
+metrics.describe('maryfetch_ratings_held_total', 'counter', 'Ratings served from the value the scheduler holds, as they were not due for a refresh.')
+metrics.describe('maryfetch_cache_hit_ratio', 'gauge', 'In-memory rating cache hit ratio since start, over the lookups for due symbol/intervals.')
+metrics.describe('maryfetch_cache_evictions_total', 'counter', 'In-memory rating cache capacity evictions.')
+metrics.describe('maryfetch_breaker_open', 'gauge', 'Symbol/intervals currently backed off by the circuit breaker.')
+metrics.describe('maryfetch_connections_opened_total', 'counter', 'TCP/TLS connections opened to TradingView.')
+metrics.describe('maryfetch_connection_reuse_ratio', 'gauge', 'Share of requests sent over an already open connection.')
+metrics.describe('maryfetch_request_rate_limit', 'gauge', 'Current adaptive request rate limit per second.')
+
+def record_request(interval, kind, started, error=None):
+    labels = {'interval': interval, 'kind': kind}
+    metrics.inc('maryfetch_requests_total', labels)
+    metrics.observe('maryfetch_request_seconds', time.perf_counter() - started, labels)
+    if error is not None:
+        metrics.inc('maryfetch_request_errors_total', {**labels, 'reason': error})
+
+def record_cycle_metrics():
+    stats = cache.stats()
+    metrics.set('maryfetch_cycle_requests', request_count)
+    metrics.set('maryfetch_cache_lookups_total', stats['hits'], {'cache': 'memory', 'result': 'hit'})
+    metrics.set('maryfetch_cache_lookups_total', stats['stale_hits'], {'cache': 'memory', 'result': 'stale'})
+    metrics.set('maryfetch_cache_lookups_total', stats['misses'], {'cache': 'memory', 'result': 'miss'})
+    metrics.set('maryfetch_cache_lookups_total', shared_cache.hits, {'cache': 'shared', 'result': 'hit'})
+    metrics.set('maryfetch_cache_lookups_total', shared_cache.misses, {'cache': 'shared', 'result': 'miss'})
+    metrics.set('maryfetch_cache_hit_ratio', stats['hit_rate'])
+    metrics.set('maryfetch_ratings_held_total', held_count)
+    metrics.set('maryfetch_cache_evictions_total', stats['evictions'])
+    metrics.set('maryfetch_revalidations_total', revalidator.started, {'result': 'started'})
+    metrics.set('maryfetch_revalidations_total', revalidator.coalesced, {'result': 'coalesced'})
+    metrics.set('maryfetch_revalidations_total', revalidator.waited, {'result': 'waited'})
+    metrics.set('maryfetch_breaker_open', breaker.open_count())
+    metrics.set('maryfetch_request_rate_limit', rate_limiter.rate)
+    metrics.set('maryfetch_connections_opened_total', transport.connections_opened())
+    metrics.set('maryfetch_connection_reuse_ratio', transport.reuse_ratio())
+    if coordinator.slot:
+        metrics.write_textfile(METRICS_PATH.replace(".prom", f".{coordinator.slot}.prom"))
+    else:
+        metrics.write_textfile(METRICS_PATH)
+
+def count_request():
+    global request_count
+    with request_count_lock:
+        request_count += 1
+
+def reset_request_count():
+    global request_count
+    with request_count_lock:
+        request_count = 0
+
+def cache_rating(cache_key, interval, rating):
+    # A rating may be served stale until its bar closes, and never longer than MAX_STALE
+    cache.set(cache_key, rating, stale_ttl=min(MAX_STALE, bar_close(interval, rating.fetched_at) - time.time()))
+
+def get_cached_rating(cache_key, interval, fresh_after=None):
+    # In-process cache first, then the on-disk cache another process may have filled.
+    # Returns (rating, fresh); a stale rating is still fine to serve while it is refetched.
+    rating, fresh = cache.lookup(cache_key, fresh_after)
+    if not fresh:
+        values = shared_cache.get(cache_key, fresh_after)
+        if values is not None:
+            rating, fresh = Rating.from_list(values), True
+            cache_rating(cache_key, interval, rating)
+    return rating, fresh
+
+def fetch_all_data(symbol, exchange, screener, interval, fresh_after=None):
     cache_key = f"{symbol}_{exchange}_{screener}_{interval}"
-    if cache_key in cache:
-        return cache[cache_key]
+    rating, fresh = get_cached_rating(cache_key, interval, fresh_after)
+    if rating is not None:
+        if not fresh:
+            revalidator.submit([cache_key], lambda keys: request_rating(symbol, exchange, screener, interval))
+        return rating
     
+    # A refetch already in flight is waited for rather than requested twice
+    if revalidator.wait_for([cache_key], REQUEST_TIMEOUT):
+        rating, fresh = get_cached_rating(cache_key, interval, fresh_after)
+        if fresh:
+            return rating
+    return request_rating(symbol, exchange, screener, interval)
+
+def request_rating(symbol, exchange, screener, interval):
+    cache_key = f"{symbol}_{exchange}_{screener}_{interval}"
+    if not breaker.allow(cache_key):
+        return None
+    if not rate_limiter.acquire(RATE_LIMIT_WAIT):
+        logging.warning(f"Skipping {symbol} on {interval}: request budget exhausted")
+        return None
+    
+    started = time.perf_counter()
     try:
-        handler = TA_Handler(
-            symbol=symbol,
-            exchange=exchange,
+        count_request()
+        analysis = transport.get_analysis(
             screener=screener,
+            exchange=exchange,
+            symbol=symbol,
             interval=interval,
-            timeout=None
+            timeout=REQUEST_TIMEOUT
         )
-        analysis = handler.get_analysis()
-        cache[cache_key] = analysis
-        return analysis
+        rating = Rating.from_analysis(analysis)
+        rate_limiter.record_success()
+        record_request(interval, 'single', started, None if rating is not None else 'empty')
+        if rating is None:
+            breaker.record_failure(cache_key)
+        else:
+            breaker.record_success(cache_key)
+            cache_rating(cache_key, interval, rating)
+            shared_cache.set(cache_key, rating.to_list(), rating.fetched_at)
+        return rating
     except Exception as e:
+        if is_throttled(e):
+            rate_limiter.record_throttle()
+        else:
+            breaker.record_failure(cache_key)
+        record_request(interval, 'single', started, 'throttled' if is_throttled(e) else 'failed')
         logging.error(f"Error fetching data for {symbol} on {interval}: {str(e)}")
         return None
 
-def calculate_momentum_score(data):
-    weights = {'STRONG_BUY': 2, 'BUY': 1, 'NEUTRAL': 0, 'SELL': -1, 'STRONG_SELL': -2}
-    score = 0
-    for interval, analysis in data.items():
-        if analysis:
-            rating = analysis.summary['RECOMMENDATION'].upper()
-            score += weights.get(rating, 0)
-    return score
+def fetch_batch(symbols, exchange, screener, interval, fresh_after=None):
+    # Fetch one interval for many symbols with a single scanner request.
+    # Stale cached ratings are returned as they are and refetched in the background.
+    results = {}
+    missing = []
+    stale = {}
+    for symbol in symbols:
+        cache_key = f"{symbol}_{exchange}_{screener}_{interval}"
+        rating, fresh = get_cached_rating(cache_key, interval, fresh_after)
+        if rating is not None:
+            results[symbol] = rating
+            if not fresh:
+                stale[cache_key] = symbol
+        elif breaker.allow(cache_key):
+            missing.append(symbol)
+    
+    if stale:
+        revalidator.submit(list(stale), lambda keys: request_batch([stale[key] for key in keys], exchange, screener, interval))
+    
+    # Refetches already in flight are waited for rather than requested twice
+    keys = {f"{symbol}_{exchange}_{screener}_{interval}": symbol for symbol in missing}
+    for cache_key in revalidator.wait_for(list(keys), REQUEST_TIMEOUT):
+        rating, fresh = get_cached_rating(cache_key, interval, fresh_after)
+        if fresh:
+            results[keys[cache_key]] = rating
+            missing.remove(keys[cache_key])
+    
+    if missing:
+        results.update(request_batch(missing, exchange, screener, interval))
+    return results
+
+def request_batch(symbols, exchange, screener, interval):
+    if not rate_limiter.acquire(RATE_LIMIT_WAIT):
+        logging.warning(f"Skipping batch of {len(symbols)} symbols on {interval}: request budget exhausted")
+        return {}
+    
+    started = time.perf_counter()
+    try:
+        count_request()
+        analyses = transport.get_multiple_analysis(
+            screener=screener,
+            interval=interval,
+            symbols=[f"{exchange}:{symbol}" for symbol in symbols],
+            timeout=REQUEST_TIMEOUT
+        )
+        rate_limiter.record_success()
+        record_request(interval, 'batch', started)
+    except Exception as e:
+        # Symbols left out here are retried one by one, where per-symbol failures are tracked
+        if is_throttled(e):
+            rate_limiter.record_throttle()
+        record_request(interval, 'batch', started, 'throttled' if is_throttled(e) else 'failed')
+        logging.error(f"Error fetching batch of {len(symbols)} symbols on {interval}: {str(e)}")
+        return {}
+    
+    results = {}
+    fetched = []
+    for symbol in symbols:
+        rating = Rating.from_analysis(analyses.get(f"{exchange}:{symbol}".upper()))
+        if rating is not None:
+            cache_key = f"{symbol}_{exchange}_{screener}_{interval}"
+            breaker.record_success(cache_key)
+            cache_rating(cache_key, interval, rating)
+            fetched.append((cache_key, rating.to_list()))
+            results[symbol] = rating
+    shared_cache.set_many(fetched)
+    return results
+
+def completed(futures, timeout):
+    # Yield futures as they finish, until the timeout runs out
+    try:
+        yield from as_completed(futures, timeout=max(timeout, 0))
+    except FuturesTimeoutError:
+        pass
+
+def fetch_cycle(symbols, exchange, screener, intervals, max_workers=MAX_WORKERS, deadline=CYCLE_DEADLINE, mode=FETCH_MODE, scheduler=None, on_symbol=None):
+    # Fan the cycle's requests out over a bounded thread pool and collect per-symbol data dicts.
+    # With a scheduler, only the symbol/intervals it reports as due are fetched, cached values
+    # are accepted only if fetched recently enough for the scheduler, and every other entry is
+    # filled with the freshest value it holds, unless its refetches have failed for too long.
+    # Work is queued highest-weight interval first, so a deadline sheds the lowest-weight intervals.
+    # on_symbol(symbol, symbol_data) is called as soon as all of a symbol's requests are in.
+    global held_count
+    data = {symbol: {interval: None for interval in intervals} for symbol in symbols}
+    cycle_start = time.time()
+    cycle_end = time.monotonic() + deadline
+    if scheduler is not None:
+        due = scheduler.due(symbols, intervals, cycle_start)
+        fresh_after = {interval: scheduler.fresh_after(interval, cycle_start) for interval in intervals}
+    else:
+        due = [(symbol, interval) for symbol in symbols for interval in intervals]
+        fresh_after = {interval: None for interval in intervals}
+    order = shed_order(intervals)
+    rank = {interval: position for position, interval in enumerate(order)}
+    due.sort(key=lambda pair: rank[pair[1]])
+    
+    due_intervals = {symbol: [] for symbol in symbols}
+    for symbol, interval in due:
+        due_intervals[symbol].append(interval)
+    outstanding = {symbol: len(due_intervals[symbol]) for symbol in symbols}
+    finished = set()
+    held = 0
+    
+    def finish(symbol):
+        nonlocal held
+        if scheduler is not None:
+            for interval in due_intervals[symbol]:
+                if data[symbol][interval] is not None:
+                    scheduler.store(symbol, interval, data[symbol][interval], data[symbol][interval].fetched_at)
+            for interval in intervals:
+                data[symbol][interval] = scheduler.freshest(symbol, interval, cycle_start)
+                if data[symbol][interval] is not None and interval not in due_intervals[symbol]:
+                    held += 1
+        finished.add(symbol)
+        if on_symbol is not None:
+            on_symbol(symbol, data[symbol])
+    
+    def resolve(symbol):
+        outstanding[symbol] -= 1
+        if outstanding[symbol] == 0:
+            finish(symbol)
+    
+    for symbol in symbols:
+        if not outstanding[symbol]:
+            finish(symbol)
+    
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        if mode == "batch":
+            due_symbols = {interval: [symbol for symbol, due_interval in due if due_interval == interval] for interval in intervals}
+            futures = {
+                executor.submit(fetch_batch, due_symbols[interval][i:i + BATCH_SIZE], exchange, screener, interval, fresh_after[interval]): interval
+                for interval in order
+                for i in range(0, len(due_symbols[interval]), BATCH_SIZE)
+            }
+            for future in completed(futures, deadline):
+                interval = futures[future]
+                for symbol, rating in future.result().items():
+                    data[symbol][interval] = rating
+                    resolve(symbol)
+        
+        # Per-symbol requests, or the fallback for anything a batch response left out
+        pending = [(symbol, interval) for symbol, interval in due if data[symbol][interval] is None]
+        if mode == "batch" and pending:
+            logging.info(f"Falling back to per-symbol requests for {len(pending)} symbol/interval pairs")
+        
+        remaining = cycle_end - time.monotonic()
+        skipped = pending
+        if remaining > 0:
+            futures = {
+                executor.submit(fetch_all_data, symbol, exchange, screener, interval, fresh_after[interval]): (symbol, interval)
+                for symbol, interval in pending
+            }
+            done = set()
+            for future in completed(futures, remaining):
+                done.add(future)
+                symbol, interval = futures[future]
+                data[symbol][interval] = future.result()
+                resolve(symbol)
+            skipped = [futures[future] for future in futures if future not in done]
+        
+        if skipped:
+            shed = Counter(interval for symbol, interval in skipped)
+            for interval, count in shed.items():
+                metrics.inc('maryfetch_requests_shed_total', {'interval': interval}, count)
+            logging.warning(f"Cycle deadline of {deadline:.0f}s reached, shed {len(skipped)} of {len(due)} requests: "
+                            + ", ".join(f"{interval} ({count})" for interval, count in shed.items()))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    
+    # Symbols with shed requests go out with whatever they have
+    for symbol in symbols:
+        if symbol not in finished:
+            finish(symbol)
+    
+    if scheduler is not None:
+        logging.info(f"{len(due)} of {len(symbols) * len(intervals)} symbol/intervals were due for refresh")
+        with held_count_lock:
+            held_count += held
+    
+    return data
+
+def job_weights(job):
+    return weight_matrix(job.get("weight_profiles", {"default": job["intervals"]}), list(job["intervals"]))
+
+def worker_shares(jobs, max_workers=MAX_WORKERS):
+    # Every exchange gets an equal share of the workers, split evenly between its jobs
+    exchanges = Counter(job["exchange"] for job in jobs)
+    return [max(1, max_workers // len(exchanges) // exchanges[job["exchange"]]) for job in jobs]
+
+def fetch_jobs(jobs, job_symbols, deadline, on_symbol=None):
+    # Run every job's fetch_cycle side by side, each on its share of the workers;
+    # on_symbol(job, symbol, symbol_data) is called as each symbol comes in
+    shares = worker_shares(jobs)
+    with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+        futures = [
+            executor.submit(fetch_cycle, job_symbols[i], job["exchange"], job["screener"], job["intervals"],
+                            max_workers=shares[i], deadline=deadline, scheduler=schedulers[job_name(job)],
+                            on_symbol=partial(on_symbol, job) if on_symbol is not None else None)
+            for i, job in enumerate(jobs)
+        ]
+        return [future.result() for future in futures]
+
+def prepare_csv():
+    # Create the CSV, or bring a file written by an older version up to the current columns, and
+    # make sure its sidecar index describes it
+    if not os.path.exists(CSV_FILE_PATH):
+        pd.DataFrame(columns=CSV_COLUMNS).to_csv(CSV_FILE_PATH, index=False)
+        csv_index.rebuild()
+        return
+    with open(CSV_FILE_PATH) as f:
+        header = f.readline().strip().split(',')
+    if header == CSV_COLUMNS:
+        if not csv_index.usable():
+            csv_index.rebuild()
+        return
+    # Appends wait until the rewritten file is in place
+    with csv_lock(CSV_FILE_PATH, exclusive=True):
+        logging.info(f"Adding the {', '.join(c for c in CSV_COLUMNS if c not in header)} column(s) to {CSV_FILE_PATH}")
+        old_df = pd.read_csv(CSV_FILE_PATH, dtype=str)
+        if 'Exchange' not in old_df.columns:
+            # Rows written before rows were tagged by exchange all came from the first job
+            old_df['Exchange'] = jobs[0]["exchange"]
+        if 'Cycle' not in old_df.columns:
+            # Older cycles were written whole, so each one is complete and gets its marker
+            old_df['Cycle'] = ((pd.to_datetime(old_df['Timestamp'], utc=True, format='ISO8601') - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)).astype(str)
+            old_cycles = old_df.groupby(['Cycle', 'Exchange'], sort=False).agg(
+                Timestamp=('Timestamp', 'first'), Symbols=('Symbol', 'size'), **{'Average Momentum': ('Average Momentum', 'first')}
+            ).reset_index()
+            append_cycle_markers(old_cycles)
+        old_df[CSV_COLUMNS].to_csv(f"{CSV_FILE_PATH}.tmp", index=False)
+        os.replace(f"{CSV_FILE_PATH}.tmp", CSV_FILE_PATH)
+        csv_index.rebuild(lock=False)
+
+def migrate_existing_csv():
+    # Dashboards read only the store once it exists, so the CSV history has to be in it. Copy it into
+    # an empty store once; the marker next to the CSV stops shard workers and restarts doing it again
+    marker = f"{CSV_FILE_PATH}.migrated"
+    if not os.path.exists(CSV_FILE_PATH):
+        return
+    with csv_lock(CSV_FILE_PATH, exclusive=True):
+        if os.path.exists(marker):
+            return
+        with open(CSV_FILE_PATH) as f:
+            f.readline()
+            if not f.readline():
+                return
+        if not store.latest_cycle().empty:
+            logging.warning(f"{CSV_FILE_PATH} has rows but the {STORAGE_BACKEND} store already has data, so the dashboards "
+                            f"will not show them; copy them in with `python marystore.py migrate`")
+            return
+        logging.info(f"Migrating the history in {CSV_FILE_PATH} into the new {STORAGE_BACKEND} store")
+        rows = migrate_csv(CSV_FILE_PATH, store, CYCLES_FILE_PATH, jobs[0]["exchange"])
+        with open(marker, 'w') as f:
+            f.write(f"{rows}\n")
+
+def append_to_csv(df):
+    # One write() on an O_APPEND descriptor, so rows streamed by concurrent jobs and shard workers never interleave
+    data = df[CSV_COLUMNS].to_csv(header=False, index=False).encode()
+    with csv_lock(CSV_FILE_PATH):
+        fd = os.open(CSV_FILE_PATH, os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+        try:
+            os.write(fd, data)
+            # O_APPEND leaves the descriptor just past our rows, wherever other writers put theirs
+            offset = os.lseek(fd, 0, os.SEEK_CUR) - len(data)
+        finally:
+            os.close(fd)
+        indexed = csv_index.append(offset, data, df['Symbol'].to_numpy(), df['Cycle'].to_numpy())
+    if not indexed:
+        csv_index.rebuild()
+
+def apply_retention(now):
+    # Roll the recent finished hours up, archive the rows older than RAW_RETENTION, then drop
+    # archived days and cycle summaries past their own retention
+    hour = now.replace(minute=0, second=0, microsecond=0)
+    before = (now - RAW_RETENTION).replace(minute=0, second=0, microsecond=0)
+    if store is not None:
+        roll_store(store, archive, hour - ROLLUP_LOOKBACK, hour)
+        rows = archive_store(store, archive, before)
+    else:
+        roll_csv(CSV_FILE_PATH, archive, hour - ROLLUP_LOOKBACK, hour, CYCLES_FILE_PATH, jobs[0]["exchange"])
+        rows = archive_csv(CSV_FILE_PATH, archive, before, CYCLES_FILE_PATH, jobs[0]["exchange"])
+        if rows:
+            csv_index.rebuild()
+    archive.prune(now)
+    summary.trim(now - SUMMARY_RETENTION)
+    if rows:
+        logging.info(f"Archived {rows} rows from before {before} to {ARCHIVE_PATH}")
+
+def append_cycle_markers(df):
+    df[CYCLES_COLUMNS].to_csv(CYCLES_FILE_PATH, mode='a', header=not os.path.exists(CYCLES_FILE_PATH), index=False)
+
+def stream_rows(cycle_start, current_datetime):
+    # on_symbol callback for fetch_jobs that writes each symbol's default-profile score as it comes in,
+    # and a flush() for rows still held back. CSV rows go out one by one; Parquet rows are gathered
+    # into one partial file every STREAM_FLUSH seconds.
+    weights = {job_name(job): job_weights(job) for job in jobs}
+    pending = []
+    pending_lock = threading.Lock()
+    last_flush = [time.monotonic()]
+    
+    def flush():
+        with pending_lock:
+            rows = pending[:]
+            pending.clear()
+            last_flush[0] = time.monotonic()
+        if not rows:
+            return
+        if store is not None:
+            store.write(pd.DataFrame(rows), complete=False)
+        else:
+            append_to_csv(pd.DataFrame(rows))
+    
+    def on_symbol(job, symbol, symbol_data):
+        scores, valid, averages = score_matrix(rating_matrix({symbol: symbol_data}, [symbol], list(job["intervals"])), weights[job_name(job)])
+        if valid[0]:
+            with pending_lock:
+                pending.append({
+                    "Symbol": symbol,
+                    "Momentum Score": scores[0, 0],
+                    "Timestamp": current_datetime,
+                    "Average Momentum": np.nan,
+                    "Exchange": job["exchange"],
+                    "Cycle": int(cycle_start)
+                })
+            if store is None or time.monotonic() - last_flush[0] >= STREAM_FLUSH:
+                flush()
+    
+    return on_symbol, flush
 
 def update_csv():
+    coordinator.claim()
+    if METRICS_PORT is not None:
+        metrics.serve(METRICS_PORT + coordinator.slot)
+    if store is not None:
+        migrate_existing_csv()
+    
+    # Cycles start on wall-clock boundaries, so sample timestamps stay evenly spaced and never drift
+    next_cycle = next_boundary(CYCLE_PERIOD, time.time())
+    next_retention = 0
     while True:
+        sleep_until(next_cycle)
+        cycle_start = next_cycle
         try:
-            results = []
-            error_symbols = []
-            current_datetime = datetime.now(timezone.utc)
+            current_datetime = datetime.fromtimestamp(cycle_start, timezone.utc)
+            deadline = min(CYCLE_DEADLINE, cycle_start + CYCLE_PERIOD - WRITE_MARGIN - time.time())
+            reset_request_count()
+            if store is None:
+                prepare_csv()
+            
+            # Fetch only this process's shard of every job's symbols
+            tickers = [f"{job['exchange']}:{symbol}" for job in jobs for symbol in job["symbols"]]
+            shard_tickers, members, is_merger = coordinator.assignment(tickers)
+            shard = set(shard_tickers)
+            job_symbols = [[symbol for symbol in job["symbols"] if f"{job['exchange']}:{symbol}" in shard] for job in jobs]
+            phase_start = time.perf_counter()
+            on_symbol, flush = stream_rows(cycle_start, current_datetime) if INGEST_MODE == "stream" else (None, None)
+            job_data = fetch_jobs(jobs, job_symbols, deadline, on_symbol)
+            if flush is not None:
+                flush()
+            job_ratings = [
+                (rating_matrix(data, shard_symbols, list(job["intervals"])), count_matrix(data, shard_symbols, list(job["intervals"])))
+                for job, shard_symbols, data in zip(jobs, job_symbols, job_data)
+            ]
+            metrics.observe('maryfetch_cycle_seconds', time.perf_counter() - phase_start, {'phase': 'fetch'})
             
-            for symbol in symbols:
-                data = {}
-                for interval, weight in intervals.items():
-                    analysis = fetch_all_data(symbol, exchange, screener, interval)
-                    data[interval] = analysis
+            # Re-rank this shard's symbols so the next cycles refetch the fast movers sooner
+            for job, shard_symbols, (ratings, counts) in zip(jobs, job_symbols, job_ratings):
+                scores, valid, averages = score_matrix(ratings, job_weights(job))
+                hot = schedulers[job_name(job)].observe(list(np.array(shard_symbols)[valid]), scores[valid, 0], averages[0])
+                metrics.set('maryfetch_hot_symbols', len(hot), {'job': job_name(job)})
+            
+            if not is_merger:
+                for job, shard_symbols, (ratings, counts) in zip(jobs, job_symbols, job_ratings):
+                    coordinator.publish(cycle_start, shard_symbols, ratings, counts, job_name(job))
+                logging.info(f"Published {len(shard_tickers)} of {len(tickers)} symbols for {current_datetime} "
+                             f"({len(members)} workers, {request_count} requests this cycle)")
+            else:
+                frames = []
+                markers = []
+                summaries = []
+                for job, shard_symbols, (ratings, counts) in zip(jobs, job_symbols, job_ratings):
+                    job_intervals = list(job["intervals"])
+                    
+                    # Combine every worker's shard into one cross-sectional cycle
+                    if len(members) > 1:
+                        phase_start = time.perf_counter()
+                        parts = coordinator.collect(cycle_start, members[1:], cycle_start + CYCLE_PERIOD - MERGE_MARGIN, job_name(job))
+                        ratings, counts = merge_shards(parts + [(shard_symbols, ratings, counts)], job["symbols"], len(job_intervals))
+                        metrics.observe('maryfetch_cycle_seconds', time.perf_counter() - phase_start, {'phase': 'merge'})
+                    
+                    # Score every symbol under every weight profile in one pass over the rating matrix
+                    phase_start = time.perf_counter()
+                    scores, valid, averages = score_matrix(ratings, job_weights(job))
+                    error_symbols = [symbol for symbol, ok in zip(job["symbols"], valid) if not ok]
+                    if error_symbols:
+                        logging.warning(f"No ratings for {len(error_symbols)} {job['exchange']} symbols: {', '.join(error_symbols)}")
+                    
+                    job_df = pd.DataFrame({
+                        "Symbol": np.array(job["symbols"])[valid],
+                        "Momentum Score": scores[valid, 0],
+                        "Timestamp": current_datetime
+                    })
+                    job_df['Average Momentum'] = averages[0]
+                    job_df['Exchange'] = job["exchange"]
+                    job_df['Cycle'] = int(cycle_start)
+                    frames.append(job_df)
+                    markers.append({"Cycle": int(cycle_start), "Timestamp": current_datetime, "Exchange": job["exchange"],
+                                    "Symbols": int(valid.sum()), "Average Momentum": averages[0]})
+                    summaries.append(summarize(cycle_start, current_datetime, job["exchange"], job_df['Symbol'], job_df['Momentum Score']))
+                    metrics.observe('maryfetch_cycle_seconds', time.perf_counter() - phase_start, {'phase': 'score'})
+                    
+                    # Keep the raw ratings behind this cycle's scores
+                    snapshot_stores[job_name(job)].append(cycle_start, ratings, counts)
+                    rings[job_name(job)].write(cycle_start, np.where(valid, scores[:, 0], np.nan), averages[0])
                 
-                if all(value is None for value in data.values()):
-                    error_symbols.append(symbol)
+                phase_start = time.perf_counter()
+                if store is not None:
+                    # The complete rows supersede whatever was streamed; fold finished hours into one file each
+                    store.write(pd.concat(frames, ignore_index=True), complete=True)
+                    store.compact(before=current_datetime.replace(minute=0, second=0, microsecond=0),
+                                  since=current_datetime - timedelta(hours=6))
                 else:
-                    weighted_score = sum(weight * calculate_momentum_score({interval: data[interval]}) for interval, weight in intervals.items() if data[interval] is not None)
-                    results.append({"Symbol": symbol, "Momentum Score": weighted_score, "Timestamp": current_datetime})
+                    # Append the new data to the CSV file, unless every worker already streamed its rows,
+                    # then mark the cycle complete
+                    if INGEST_MODE != "stream":
+                        append_to_csv(pd.concat(frames, ignore_index=True))
+                    append_cycle_markers(pd.DataFrame(markers))
+                summary.append(pd.DataFrame(summaries))
+                metrics.observe('maryfetch_cycle_seconds', time.perf_counter() - phase_start, {'phase': 'write'})
+                
+                if cycle_start >= next_retention:
+                    phase_start = time.perf_counter()
+                    apply_retention(current_datetime)
+                    next_retention = next_boundary(RETENTION_PERIOD, cycle_start)
+                    metrics.observe('maryfetch_cycle_seconds', time.perf_counter() - phase_start, {'phase': 'retention'})
+                coordinator.cleanup(cycle_start - 10 * CYCLE_PERIOD)
+                
+                logging.info(f"Scores written at {current_datetime} ({len(members)} workers, {request_count} requests this cycle)")
             
-            new_df = pd.DataFrame(results)
-            new_df['Average Momentum'] = new_df['Momentum Score'].mean()
+            metrics.observe('maryfetch_cycle_seconds', time.time() - cycle_start, {'phase': 'total'})
+            metrics.inc('maryfetch_cycles_total')
+            record_cycle_metrics()
             
-            # Append the new data to the CSV file
-            if os.path.exists(CSV_FILE_PATH):
-                new_df.to_csv(CSV_FILE_PATH, mode='a', header=False, index=False)
-            else:
-                new_df.to_csv(CSV_FILE_PATH, index=False)
+            stats = cache.stats()
+            logging.info(f"Cache: {stats['size']}/{stats['maxsize']} entries, {stats['hits']} hits, {stats['stale_hits']} stale, "
+                         f"{stats['misses']} misses, {stats['evictions']} evictions, {stats['expirations']} expirations "
+                         f"({stats['hit_rate']:.1%} hit rate), {held_count} served from held values, "
+                         f"{revalidator.started} background refreshes")
+            logging.info(f"{breaker.open_count()} symbol/intervals backed off, request rate {rate_limiter.rate:.1f}/s, "
+                         f"{transport.reuse_ratio():.1%} of requests reused a connection")
             
-            logging.info(f"CSV updated at {current_datetime}")
+            shared_cache.purge_expired()
             
-            # Sleep for 1 minute before the next update
-            time.sleep(60)
+            # Start the next cycle on the next boundary; an overrun skips the missed ones
+            next_cycle = next_boundary(CYCLE_PERIOD, time.time())
+            missed = int((next_cycle - cycle_start) // CYCLE_PERIOD) - 1
+            if missed > 0:
+                logging.warning(f"Cycle overran its {CYCLE_PERIOD}s period, skipping {missed} cycle(s)")
             
         except Exception as e:
             logging.error(f"An error occurred: {str(e)}")
-            time.sleep(180)  # Wait 3 minutes before retrying
+            metrics.inc('maryfetch_cycle_errors_total')
+            next_cycle = next_boundary(CYCLE_PERIOD, time.time() + 180)  # Wait 3 minutes before retrying
 
 if __name__ == "__main__":
     update_csv()
\ No newline at end of file
@@ -4,6 +4,12 @@ from datetime import datetime, timezone, timedelta
 import time
 import logging
 import os
+from marystore import PartitionedStore
+from marysql import SqlStore
+from maryring import ScoreRing
+from marytail import CsvTail
+from marysummary import SummaryTable
+from marysymbols import SCORE_DTYPES, compact
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -11,6 +17,26 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 # CSV file path
 CSV_FILE_PATH = "momentum_scores.csv"
 
+# Hourly Parquet partitions written by maryfetch's Parquet backend; used instead of the CSV when present
+STORE_PATH = "momentum_store"
+
+# SQLAlchemy URL of maryfetch's SQL backend, e.g. "sqlite:///momentum_scores.db"; takes precedence when set
+STORE_URL = None
+
+# maryfetch's memory-mapped ring of the last 24 hours of complete cycles, e.g. "momentum_ring.bin".
+# Opt-in: the ring holds no streamed rows, so with it the cycle still coming in is not shown.
+RING_PATH = None
+
+# Completeness markers: a cycle's rows may stream in symbol by symbol, and the cycle only
+# counts as complete once maryfetch has listed it here
+CYCLES_FILE_PATH = "momentum_cycles.csv"
+
+# maryfetch's per-cycle summaries: market average, breadth and ranking of every complete cycle
+SUMMARY_PATH = "momentum_summary.csv"
+
+# Exchange whose rows are shown; files written before rows were tagged hold only this one
+EXCHANGE = "BYBIT"
+
 # Set the page config
 st.set_page_config(
     page_title="Momentum Score Dashboard",
@@ -43,66 +69,66 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
-# List of symbols (kept the same)
-symbols = [
-    "10000LADYSUSDT.P", "10000NFTUSDT.P", "1000BONKUSDT.P", "1000BTTUSDT.P", 
-    "1000FLOKIUSDT.P", "1000LUNCUSDT.P", "1000PEPEUSDT.P", "1000XECUSDT.P", 
-    "1INCHUSDT.P", "AAVEUSDT.P", "ACHUSDT.P", "ADAUSDT.P", "AGLDUSDT.P", 
-    "AKROUSDT.P", "ALGOUSDT.P", "ALICEUSDT.P", "ALPACAUSDT.P", 
-    "ALPHAUSDT.P", "AMBUSDT.P", "ANKRUSDT.P", "ANTUSDT.P", 
-    "APEUSDT.P", "API3USDT.P", "APTUSDT.P", "ARUSDT.P", "ARBUSDT.P", "ARKUSDT.P", 
-    "ARKMUSDT.P", "ARPAUSDT.P", "ASTRUSDT.P", "ATAUSDT.P", "ATOMUSDT.P", 
-    "AUCTIONUSDT.P", "AUDIOUSDT.P", "AVAXUSDT.P", "AXSUSDT.P", "BADGERUSDT.P", 
-    "BAKEUSDT.P", "BALUSDT.P", "BANDUSDT.P", "BATUSDT.P", "BCHUSDT.P", 
-    "BELUSDT.P", "BICOUSDT.P", "BIGTIMEUSDT.P", "BLURUSDT.P", "BLZUSDT.P",
-    "BTCUSDT.P", "C98USDT.P", "CEEKUSDT.P", "CELOUSDT.P", "CELRUSDT.P", "CFXUSDT.P",
-    "CHRUSDT.P", "CHZUSDT.P", "CKBUSDT.P", "COMBOUSDT.P", "COMPUSDT.P",
-    "COREUSDT.P", "COTIUSDT.P", "CROUSDT.P", "CRVUSDT.P", "CTCUSDT.P",
-    "CTKUSDT.P", "CTSIUSDT.P", "CVCUSDT.P", "CVXUSDT.P", "CYBERUSDT.P", "DARUSDT.P",
-    "DASHUSDT.P", "DENTUSDT.P", "DGBUSDT.P", "DODOUSDT.P", "DOGEUSDT.P", "DOTUSDT.P",
-    "DUSKUSDT.P", "DYDXUSDT.P", "EDUUSDT.P", "EGLDUSDT.P", "ENJUSDT.P", "ENSUSDT.P",
-    "EOSUSDT.P", "ETCUSDT.P", "ETHUSDT.P", "ETHWUSDT.P", "FILUSDT.P",
-    "FITFIUSDT.P", "FLOWUSDT.P", "FLRUSDT.P", "FORTHUSDT.P", "FRONTUSDT.P", "FTMUSDT.P",
-    "FXSUSDT.P", "GALAUSDT.P", "GFTUSDT.P", "GLMUSDT.P",
-    "GLMRUSDT.P", "GMTUSDT.P", "GMXUSDT.P", "GRTUSDT.P", "GTCUSDT.P", "HBARUSDT.P", 
-    "HFTUSDT.P", "HIFIUSDT.P", "HIGHUSDT.P", "HNTUSDT.P",
-    "HOOKUSDT.P", "HOTUSDT.P", "ICPUSDT.P", "ICXUSDT.P", "IDUSDT.P", "IDEXUSDT.P",
-    "ILVUSDT.P", "IMXUSDT.P", "INJUSDT.P", "IOSTUSDT.P", "IOTAUSDT.P", "IOTXUSDT.P",
-    "JASMYUSDT.P", "JOEUSDT.P", "JSTUSDT.P", "KASUSDT.P", "KAVAUSDT.P", "KDAUSDT.P",
-    "KEYUSDT.P", "KLAYUSDT.P", "KNCUSDT.P", "KSMUSDT.P", "LDOUSDT.P", "LEVERUSDT.P",
-    "LINAUSDT.P", "LINKUSDT.P", "LITUSDT.P", "LOOKSUSDT.P", "LOOMUSDT.P", "LPTUSDT.P",
-    "LQTYUSDT.P", "LRCUSDT.P", "LTCUSDT.P", "LUNA2USDT.P", "MAGICUSDT.P",
-    "MANAUSDT.P", "MASKUSDT.P", "MATICUSDT.P", "MAVUSDT.P", "MDTUSDT.P",
-    "MINAUSDT.P", "MKRUSDT.P", "MNTUSDT.P", "MTLUSDT.P", "NEARUSDT.P",
-    "NEOUSDT.P", "NKNUSDT.P", "NMRUSDT.P", "NTRNUSDT.P", "OGUSDT.P",
-    "OGNUSDT.P", "OMGUSDT.P", "ONEUSDT.P", "ONTUSDT.P", "OPUSDT.P", "ORBSUSDT.P",
-    "ORDIUSDT.P", "OXTUSDT.P", "PAXGUSDT.P", "PENDLEUSDT.P", "PEOPLEUSDT.P", "PERPUSDT.P",
-    "PHBUSDT.P", "PROMUSDT.P", "QNTUSDT.P", "QTUMUSDT.P", "RADUSDT.P", "RDNTUSDT.P", 
-    "REEFUSDT.P", "RENUSDT.P", "REQUSDT.P", "RLCUSDT.P", "ROSEUSDT.P", 
-    "RPLUSDT.P", "RSRUSDT.P", "RSS3USDT.P", "RUNEUSDT.P", "RVNUSDT.P",
-    "SANDUSDT.P", "SCUSDT.P", "SCRTUSDT.P", "SEIUSDT.P", "SFPUSDT.P", "SHIB1000USDT.P",
-    "SKLUSDT.P", "SLPUSDT.P", "SNXUSDT.P", "SOLUSDT.P", "SPELLUSDT.P", "SSVUSDT.P", 
-    "STGUSDT.P", "STMXUSDT.P", "STORJUSDT.P", "STPTUSDT.P", "STXUSDT.P", "SUIUSDT.P", 
-    "SUNUSDT.P", "SUSHIUSDT.P", "SWEATUSDT.P", "SXPUSDT.P",
-    "TUSDT.P", "THETAUSDT.P", "TLMUSDT.P", "TOMIUSDT.P", "TONUSDT.P",
-    "TRBUSDT.P", "TRUUSDT.P", "TRXUSDT.P", "TWTUSDT.P", "UMAUSDT.P", "UNFIUSDT.P",
-    "UNIUSDT.P", "USDCUSDT.P", "VETUSDT.P", "VGXUSDT.P", "VRAUSDT.P",
-    "WAVESUSDT.P", "WAXPUSDT.P", "WLDUSDT.P", "WOOUSDT.P", "XCNUSDT.P",
-    "XEMUSDT.P", "XLMUSDT.P", "XMRUSDT.P", "XNOUSDT.P", "XRPUSDT.P", "XTZUSDT.P",
-    "XVGUSDT.P", "XVSUSDT.P", "YFIUSDT.P", "YGGUSDT.P", "ZECUSDT.P", "ZENUSDT.P", "ZILUSDT.P", "ZRXUSDT.P"
-]
+@st.cache_resource
+def open_store():
+    # The SQL store if STORE_URL is set, else the score ring if RING_PATH is set and present, or the
+    # Parquet partitions if present, else None for the CSV
+    if STORE_URL is not None:
+        return SqlStore(STORE_URL)
+    if RING_PATH is not None and os.path.exists(RING_PATH):
+        return ScoreRing(RING_PATH)
+    if os.path.isdir(STORE_PATH):
+        return PartitionedStore(STORE_PATH)
+    return None
+
+@st.cache_resource
+def csv_tail(path, dtype=None, convert=None):
+    # Kept across reruns and sessions, so each refresh only parses the lines appended since the last one
+    return CsvTail(path, dtype=dtype, convert=convert)
+
+@st.cache_resource
+def open_summary():
+    # Kept across reruns and sessions, so each refresh only parses the summaries appended since the last one
+    return SummaryTable(SUMMARY_PATH)
+
+def get_market_summary(complete_df):
+    # The average score over the last 24 hours' complete cycles and the newest cycle's summary row,
+    # from maryfetch's summaries when they reach back that far, else from the rows themselves
+    start = datetime.now(timezone.utc) - timedelta(hours=24)
+    summary = open_summary()
+    if summary.covers(start):
+        df = summary.read(start=start, exchange=EXCHANGE)
+        if df['Symbols'].sum() > 0:
+            return (df['Mean'] * df['Symbols']).sum() / df['Symbols'].sum(), df.iloc[-1]
+    return complete_df['Momentum Score'].mean(), None
 
 @st.cache_data(ttl=120)
 def get_historical_data():
-    if not os.path.exists(CSV_FILE_PATH):
-        return pd.DataFrame(columns=['Symbol', 'Momentum Score', 'Timestamp'])
+    last_24_hours = datetime.now(timezone.utc) - timedelta(hours=24)
+    store = open_store()
+    if store is not None:
+        # Only the last day's rows are fetched, kept with registry-coded symbols and float32 scores
+        df = compact(store.read(start=last_24_hours, exchange=EXCHANGE))
+        return df.sort_values('Timestamp', ascending=False)
+    
+    # Read the markers first, so no cycle is marked complete before all of its rows are read
+    complete_cycles = set()
+    cycles_df = csv_tail(CYCLES_FILE_PATH).read()
+    if cycles_df is not None:
+        complete_cycles = set(cycles_df.loc[cycles_df['Exchange'] == EXCHANGE, 'Cycle'])
     
-    df = pd.read_csv(CSV_FILE_PATH, parse_dates=['Timestamp'])
-    df['Timestamp'] = pd.to_datetime(df['Timestamp'], utc=True)
+    # Only the lines appended since the last refresh are parsed, straight into the compact dtypes;
+    # compact() codes each chunk's symbols, warning about and keeping any that are not registered
+    df = csv_tail(CSV_FILE_PATH, SCORE_DTYPES, compact).read()
+    if df is None:
+        return pd.DataFrame(columns=['Symbol', 'Momentum Score', 'Timestamp', 'Complete'])
+    if 'Exchange' in df.columns:
+        df = df[df['Exchange'] == EXCHANGE]
+    # Files written before cycle ids only ever held whole cycles
+    df['Complete'] = df['Cycle'].isin(complete_cycles) if 'Cycle' in df.columns else True
     
     # Filter for last 24 hours
-    last_24_hours = datetime.now(timezone.utc) - timedelta(hours=24)
-    df = df[df['Timestamp'] >= last_24_hours]
+    df = compact(df[df['Timestamp'] >= last_24_hours])
     
     return df.sort_values('Timestamp', ascending=False)
 
@@ -137,17 +163,15 @@ def display_filtered_scores(results, historical_df):
     return positive_df, negative_df
 
 @st.cache_data(ttl=120)
-def identify_momentum_crossovers(df):
-    avg_momentum = df['Momentum Score'].mean()
-
-    df['Previous Score'] = df.groupby('Symbol')['Momentum Score'].shift(1)
+def identify_momentum_crossovers(df, avg_momentum):
+    df['Previous Score'] = df.groupby('Symbol', observed=True)['Momentum Score'].shift(1)
     df['Crossed Up'] = (df['Previous Score'] < avg_momentum) & (df['Momentum Score'] >= avg_momentum)
     df['Crossed Down'] = (df['Previous Score'] > avg_momentum) & (df['Momentum Score'] <= avg_momentum)
 
     crossed_up = df[df['Crossed Up']].sort_values('Momentum Score', ascending=False)
     crossed_down = df[df['Crossed Down']].sort_values('Momentum Score', ascending=True)
 
-    return crossed_up, crossed_down, avg_momentum
+    return crossed_up, crossed_down
 
 def main():
     st.title('Momentum Score Dashboard')
@@ -170,8 +194,13 @@ def main():
             df = get_historical_data()
             historical_df = df[['Symbol', 'Momentum Score']].copy()
             
+            # Cross-sectional stats only use complete cycles; the per-symbol tables show the
+            # freshest score of every symbol, including the cycle still coming in
+            complete_df = df[df['Complete']].copy()
+            in_progress_df = df[~df['Complete']]
+            
             # Get the latest results
-            latest_results = df[df['Timestamp'] == df['Timestamp'].max()].to_dict('records')
+            latest_results = df.drop_duplicates('Symbol').to_dict('records')
             
             # Display top 20 scores
             long_df, short_df = display_top_20_scores(latest_results, historical_df)
@@ -180,7 +209,8 @@ def main():
             positive_df, negative_df = display_filtered_scores(latest_results, historical_df)
             
             # Identify momentum crossovers
-            crossed_up, crossed_down, avg_momentum = identify_momentum_crossovers(df)
+            avg_momentum, latest_summary = get_market_summary(complete_df)
+            crossed_up, crossed_down = identify_momentum_crossovers(complete_df, avg_momentum)
             
             # Update the placeholders with the latest data
             with long_scores_placeholder.container():
@@ -197,6 +227,10 @@ def main():
                 st.metric("Avg Change in Top 20 Long Scores", f"{avg_change_long:.2f}", f"{avg_change_long:.2f}")
                 st.metric("Avg Change in Top 20 Short Scores", f"{avg_change_short:.2f}", f"{avg_change_short:.2f}")
                 st.metric("Average Momentum Score", f"{avg_momentum:.2f}")
+                if latest_summary is not None:
+                    st.metric("Breadth (above / below zero)", f"{int(latest_summary['Above'])} / {int(latest_summary['Below'])}")
+                if not in_progress_df.empty:
+                    st.caption(f"Cycle in progress: {in_progress_df['Symbol'].nunique()} symbols in so far")
             
             with positive_filter_placeholder.container():
                 st.subheader("Symbols with Momentum 0.1 to 0.4 & Change 1.1 to 1.5:")
@@ -0,0 +1,191 @@
+import numpy as np
+import pandas as pd
+from contextlib import contextmanager, nullcontext
+import tempfile
+import logging
+import shutil
+import fcntl
+import math
+import json
+import sys
+import io
+import os
+
+# Where a run of rows sharing a cycle id sits in the CSV
+POSTING = np.dtype([('cycle', '<i8'), ('offset', '<i8'), ('length', '<i8')])
+MIN_CYCLE, MAX_CYCLE = np.iinfo(np.int64).min, np.iinfo(np.int64).max
+
+@contextmanager
+def csv_lock(csv_path, exclusive=False):
+    # Appenders share the lock; rewriting the CSV or its index takes it exclusively, so no appended row is lost
+    fd = os.open(f"{csv_path}.lock", os.O_RDWR | os.O_CREAT)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+    finally:
+        os.close(fd)
+
+class CsvIndex:
+    """Sidecar index into an append-only momentum_scores.csv, for reading a time range or a few symbols.
+
+    Lives in `<csv>.index/`: cycles.idx holds a (cycle, byte offset, length) posting per appended
+    block of rows, and symbols/<SYMBOL>.idx one per row of that symbol. Postings are appended in
+    cycle order, so a reader binary-searches the memory-mapped postings for its time range and
+    then reads just those byte ranges of the CSV. meta.json records the CSV's inode; after the
+    CSV is replaced the index is ignored until rebuild() runs. Appenders hold csv_lock shared
+    while they write rows and postings; rebuild() takes it exclusively.
+    """
+
+    def __init__(self, csv_path, directory=None):
+        self.csv_path = csv_path
+        self.directory = directory or f"{csv_path}.index"
+
+    def symbol_path(self, symbol, directory=None):
+        return os.path.join(directory or self.directory, "symbols", f"{symbol}.idx")
+
+    def cycles_path(self, directory=None):
+        return os.path.join(directory or self.directory, "cycles.idx")
+
+    def meta_path(self, directory=None):
+        return os.path.join(directory or self.directory, "meta.json")
+
+    def usable(self):
+        # The index only describes the CSV it was built for
+        try:
+            with open(self.meta_path()) as f:
+                return json.load(f)['inode'] == os.stat(self.csv_path).st_ino
+        except (OSError, ValueError, KeyError):
+            return False
+
+    def write_postings(self, path, postings):
+        # One write() on an O_APPEND descriptor, like the CSV rows themselves
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+        try:
+            os.write(fd, postings.tobytes())
+        finally:
+            os.close(fd)
+
+    def add(self, offset, data, symbols, cycles, directory=None):
+        # Index the rows of `data`, which was written at `offset`; symbols/cycles give each row's values
+        lengths = np.array([len(line) for line in data.splitlines(keepends=True)], dtype=np.int64)
+        offsets = offset + np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        cycles = np.asarray(cycles, dtype=np.int64)
+        symbols = np.asarray(symbols)
+
+        # One cycles.idx posting per run of rows from the same cycle
+        starts = np.flatnonzero(np.concatenate([[True], cycles[1:] != cycles[:-1]]))
+        ends = np.append(starts[1:], len(cycles))
+        blocks = np.zeros(len(starts), dtype=POSTING)
+        blocks['cycle'] = cycles[starts]
+        blocks['offset'] = offsets[starts]
+        blocks['length'] = offsets[ends - 1] + lengths[ends - 1] - offsets[starts]
+        self.write_postings(self.cycles_path(directory), blocks)
+
+        rows = np.zeros(len(cycles), dtype=POSTING)
+        rows['cycle'], rows['offset'], rows['length'] = cycles, offsets, lengths
+        for symbol in pd.unique(symbols):
+            self.write_postings(self.symbol_path(symbol, directory), rows[symbols == symbol])
+
+    def append(self, offset, data, symbols, cycles):
+        # Index rows just written under the shared csv_lock. Returns False if the index needs a
+        # rebuild() instead, which covers these rows too and has to wait for the lock to be released.
+        if not self.usable():
+            return False
+        self.add(offset, data, symbols, cycles)
+        return True
+
+    def rebuild(self, lock=True):
+        # Index the whole CSV from scratch, then swap the new index in. Pass lock=False when the
+        # caller already holds csv_lock exclusively.
+        with csv_lock(self.csv_path, exclusive=True) if lock else nullcontext():
+            self.build()
+
+    def build(self):
+        parent = os.path.dirname(os.path.abspath(self.directory))
+        tmp_directory = tempfile.mkdtemp(dir=parent, prefix=f"{os.path.basename(self.directory)}.tmp")
+        # mkdtemp makes it private; the dashboards read the index too
+        os.chmod(tmp_directory, 0o755)
+        try:
+            self.build_into(tmp_directory)
+        except BaseException:
+            shutil.rmtree(tmp_directory, ignore_errors=True)
+            raise
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.replace(tmp_directory, self.directory)
+
+    def build_into(self, tmp_directory):
+        os.makedirs(os.path.join(tmp_directory, "symbols"))
+        inode = os.stat(self.csv_path).st_ino
+        with open(self.csv_path, 'rb') as f:
+            header = f.readline()
+            data = f.read()
+        data = data[:data.rfind(b"\n") + 1]
+        rows = 0
+        if data:
+            df = pd.read_csv(io.BytesIO(header + data), usecols=lambda column: column in ('Symbol', 'Timestamp', 'Cycle'))
+            if 'Cycle' not in df.columns:
+                # Files written before cycle ids: a cycle is its timestamp in epoch seconds
+                df['Cycle'] = (pd.to_datetime(df['Timestamp'], utc=True, format='ISO8601') - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)
+            self.add(len(header), data, df['Symbol'].to_numpy(), df['Cycle'].to_numpy(), tmp_directory)
+            rows = len(df)
+        else:
+            open(self.cycles_path(tmp_directory), 'wb').close()
+        with open(self.meta_path(tmp_directory), 'w') as f:
+            json.dump({'inode': inode}, f)
+        logging.info(f"Indexed {rows} rows of {self.csv_path}")
+
+    def postings(self, path):
+        # Memory-map a postings file, ignoring a posting still being written
+        try:
+            count = os.path.getsize(path) // POSTING.itemsize
+        except OSError:
+            count = 0
+        if count == 0:
+            return np.zeros(0, dtype=POSTING)
+        return np.memmap(path, dtype=POSTING, mode='r', shape=(count,))
+
+    def read(self, start=None, end=None, symbols=None):
+        """Rows with start <= Timestamp < end, optionally only `symbols`, or None if the index can't be used.
+
+        Only the postings inside the range and the CSV bytes they point at are read.
+        """
+        if not self.usable():
+            return None
+        start_cycle = MIN_CYCLE if start is None else int(pd.Timestamp(start).timestamp())
+        end_cycle = MAX_CYCLE if end is None else math.ceil(pd.Timestamp(end).timestamp())
+        paths = [self.cycles_path()] if symbols is None else [self.symbol_path(symbol) for symbol in symbols]
+        selected = []
+        for path in paths:
+            postings = self.postings(path)
+            low, high = np.searchsorted(postings['cycle'], [start_cycle, end_cycle])
+            selected.append(np.array(postings[low:high]))
+        postings = np.sort(np.concatenate(selected), order='offset')
+
+        # Merge touching ranges, so consecutive rows come back in one read
+        ranges = []
+        for offset, length in zip(postings['offset'].tolist(), postings['length'].tolist()):
+            if ranges and offset <= ranges[-1][0] + ranges[-1][1]:
+                ranges[-1][1] = max(ranges[-1][1], offset + length - ranges[-1][0])
+            else:
+                ranges.append([offset, length])
+        with open(self.csv_path, 'rb') as f:
+            header = f.readline()
+            data = b"".join(os.pread(f.fileno(), length, offset) for offset, length in ranges)
+
+        df = pd.read_csv(io.BytesIO(header + data))
+        df['Timestamp'] = pd.to_datetime(df['Timestamp'], utc=True, format='ISO8601')
+        keep = pd.Series(True, index=df.index)
+        if start is not None:
+            keep &= df['Timestamp'] >= pd.Timestamp(start)
+        if end is not None:
+            keep &= df['Timestamp'] < pd.Timestamp(end)
+        if symbols is not None:
+            keep &= df['Symbol'].isin(list(symbols))
+        return df[keep].reset_index(drop=True)
+
+if __name__ == "__main__":
+    # python maryindex.py rebuild [momentum_scores.csv]
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if len(sys.argv) < 2 or sys.argv[1] != "rebuild":
+        sys.exit("usage: python maryindex.py rebuild [csv_path]")
+    CsvIndex(sys.argv[2] if len(sys.argv) > 2 else "momentum_scores.csv").rebuild()
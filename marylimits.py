@@ -0,0 +1,83 @@
+import threading
+import logging
+import time
+import requests
+
+def is_throttled(error):
+    # Rate limiting and timeouts are upstream problems, not a sign that the symbol is dead
+    if isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+        return True
+    message = str(error)
+    return "429" in message or "Too Many Requests" in message
+
+class CircuitBreaker:
+    """Per-key circuit breaker with exponential backoff.
+
+    After `threshold` consecutive failures a key is skipped (negatively cached) for
+    `base_delay` seconds, doubling on every further failure up to `max_delay`. Once the
+    backoff runs out a single trial request is let through; success closes the circuit.
+    """
+
+    def __init__(self, threshold=3, base_delay=60, max_delay=6 * 60 * 60):
+        self.threshold = threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failures = {}
+        self.open_until = {}
+        self.lock = threading.Lock()
+
+    def allow(self, key):
+        with self.lock:
+            return self.open_until.get(key, 0) <= time.monotonic()
+
+    def record_success(self, key):
+        with self.lock:
+            self.failures.pop(key, None)
+            self.open_until.pop(key, None)
+
+    def record_failure(self, key):
+        with self.lock:
+            failures = self.failures.get(key, 0) + 1
+            self.failures[key] = failures
+            if failures >= self.threshold:
+                delay = min(self.max_delay, self.base_delay * 2 ** (failures - self.threshold))
+                self.open_until[key] = time.monotonic() + delay
+                logging.warning(f"Circuit open for {key} after {failures} failures, retrying in {delay}s")
+
+    def open_count(self):
+        now = time.monotonic()
+        with self.lock:
+            return sum(1 for until in self.open_until.values() if until > now)
+
+class AdaptiveRateLimiter:
+    """Global request pacer that halves its rate on throttling and creeps back up on success."""
+
+    def __init__(self, max_rate, min_rate=1.0, increase=0.5):
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.increase = increase
+        self.rate = max_rate
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self, max_wait):
+        # Reserve the next request slot; give up rather than wait longer than max_wait seconds
+        with self.lock:
+            now = time.monotonic()
+            self.next_slot = max(self.next_slot, now)
+            wait = self.next_slot - now
+            if wait > max_wait:
+                return False
+            self.next_slot += 1.0 / self.rate
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    def record_success(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def record_throttle(self):
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            logging.warning(f"Upstream throttling, request rate lowered to {self.rate:.1f}/s")
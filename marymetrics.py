@@ -0,0 +1,106 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import logging
+import os
+
+# Histogram buckets in seconds, from a fast cached scanner hit up to a timed-out request
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+class Metrics:
+    """Minimal thread-safe registry of counters, gauges and histograms in the Prometheus text format.
+
+    Metrics are declared once with describe(), then updated by name with an optional label dict.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.types = {}
+        self.help = {}
+        self.buckets = {}
+        self.values = {}
+
+    def describe(self, name, kind, help_text, buckets=DEFAULT_BUCKETS):
+        self.types[name] = kind
+        self.help[name] = help_text
+        if kind == 'histogram':
+            self.buckets[name] = buckets
+
+    def key(self, name, labels):
+        return name, tuple(sorted((labels or {}).items()))
+
+    def inc(self, name, labels=None, value=1):
+        key = self.key(name, labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+    def set(self, name, value, labels=None):
+        # Gauges, and counters mirrored from somewhere that already keeps a running total
+        with self.lock:
+            self.values[self.key(name, labels)] = value
+
+    def observe(self, name, value, labels=None):
+        key = self.key(name, labels)
+        buckets = self.buckets[name]
+        with self.lock:
+            counts, total, count = self.values.get(key, ([0] * len(buckets), 0.0, 0))
+            counts = [c + (value <= bound) for c, bound in zip(counts, buckets)]
+            self.values[key] = (counts, total + value, count + 1)
+
+    def format_labels(self, labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+    def render(self):
+        lines = []
+        with self.lock:
+            values = dict(self.values)
+        for name, kind in self.types.items():
+            series = [(labels, value) for (metric, labels), value in values.items() if metric == name]
+            if not series:
+                continue
+            lines.append(f"# HELP {name} {self.help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(series):
+                if kind == 'histogram':
+                    counts, total, count = value
+                    for bound, bucket_count in zip(self.buckets[name], counts):
+                        lines.append(f"{name}_bucket{self.format_labels(labels, [('le', bound)])} {bucket_count}")
+                    lines.append(f"{name}_bucket{self.format_labels(labels, [('le', '+Inf')])} {count}")
+                    lines.append(f"{name}_sum{self.format_labels(labels)} {total}")
+                    lines.append(f"{name}_count{self.format_labels(labels)} {count}")
+                else:
+                    lines.append(f"{name}{self.format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path):
+        # Write-then-rename so a scraper never reads a half-written file
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                f.write(self.render())
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.warning(f"Could not write metrics to {path}: {str(e)}")
+
+    def serve(self, port, host="127.0.0.1"):
+        # Serve /metrics locally from a daemon thread
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        logging.info(f"Serving metrics on http://{host}:{port}/metrics")
+        return server
@@ -2,7 +2,15 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 import time
-from datetime import datetime, timedelta
+import os
+from datetime import datetime, timezone, timedelta
+from marystore import PartitionedStore
+from marysql import SqlStore
+from maryring import ScoreRing
+from maryarchive import Archive
+from marypyramid import ScorePyramid, CsvHistory
+from marysummary import SummaryTable
+from marysymbols import compact
 
 # Set up Streamlit page config
 st.set_page_config(page_title="Crypto Momentum Plot", layout="wide")
@@ -10,23 +18,69 @@ st.set_page_config(page_title="Crypto Momentum Plot", layout="wide")
 # CSV file path
 CSV_FILE_PATH = "momentum_scores.csv"
 
+# Hourly Parquet partitions written by maryfetch's Parquet backend; used instead of the CSV when present
+STORE_PATH = "momentum_store"
+
+# SQLAlchemy URL of maryfetch's SQL backend, e.g. "sqlite:///momentum_scores.db"; takes precedence when set
+STORE_URL = None
+
+# maryfetch's memory-mapped ring of the last 24 hours of complete cycles, e.g. "momentum_ring.bin".
+# Opt-in: the ring holds no streamed rows, so with it the cycle still coming in is not plotted.
+RING_PATH = None
+
+# maryfetch's completeness markers and its archive of aged-out scores and their rollups
+CYCLES_FILE_PATH = "momentum_cycles.csv"
+ARCHIVE_PATH = "momentum_archive"
+
+# maryfetch's per-cycle summaries, which hold each cycle's market average
+SUMMARY_PATH = "momentum_summary.csv"
+
+# Time ranges offered, in hours; longer ones are read at a coarser resolution so they load as fast
+RANGE_OPTIONS = [1, 6, 12, 24, 72, 168, 336, 720]
+# Points a line is aimed at across the plot
+PLOT_POINTS = 1000
+
+# Exchange whose rows are plotted; files written before rows were tagged hold only this one
+EXCHANGE = "BYBIT"
+
 # Symbols to plot
 SYMBOLS = ["BTCUSDT.P", "APTUSDT.P"]
 
+@st.cache_resource
+def open_store(use_ring=True):
+    # The SQL store if STORE_URL is set, else the score ring (if RING_PATH is set and `use_ring`) or
+    # the Parquet partitions if present, else the CSV with its sidecar index and completeness markers
+    if STORE_URL is not None:
+        return SqlStore(STORE_URL)
+    if use_ring and RING_PATH is not None and os.path.exists(RING_PATH):
+        return ScoreRing(RING_PATH)
+    if os.path.isdir(STORE_PATH):
+        return PartitionedStore(STORE_PATH)
+    return CsvHistory(CSV_FILE_PATH, CYCLES_FILE_PATH)
+
+@st.cache_resource
+def open_summary():
+    # Kept across reruns and sessions, so each refresh only parses the summaries appended since the last one
+    return SummaryTable(SUMMARY_PATH)
+
+def open_pyramid(hours):
+    # The ring only reaches back 24 hours; older rows come from the archive's rollups
+    return ScorePyramid(open_store(use_ring=hours <= 24), Archive(ARCHIVE_PATH), summary=open_summary())
+
 @st.cache_data(ttl=300)  # Cache for 5 minutes
-def get_historical_data():
-    df = pd.read_csv(CSV_FILE_PATH, parse_dates=['Timestamp'])
-    df['Timestamp'] = pd.to_datetime(df['Timestamp'], utc=True)
-    return df[
-        (df['Timestamp'] >= datetime.now(df['Timestamp'].dt.tz) - timedelta(hours=24)) &
-        (df['Symbol'].isin(SYMBOLS))
-    ].sort_values('Timestamp', ascending=False)
+def get_historical_data(hours):
+    # SYMBOLS over the last `hours`, at the coarsest resolution that still fills the plot
+    start = datetime.now(timezone.utc) - timedelta(hours=hours)
+    pyramid = open_pyramid(hours)
+    df = pd.concat([pyramid.series(symbol, start, width=PLOT_POINTS, exchange=EXCHANGE)[1] for symbol in SYMBOLS], ignore_index=True)
+    return compact(df).sort_values('Timestamp', ascending=False)
 
 @st.cache_data(ttl=300)  # Cache for 5 minutes
-def get_average_momentum():
-    df = pd.read_csv(CSV_FILE_PATH, parse_dates=['Timestamp'])
-    df['Timestamp'] = pd.to_datetime(df['Timestamp'], utc=True)
-    return df[df['Timestamp'] >= datetime.now(df['Timestamp'].dt.tz) - timedelta(hours=24)].groupby('Timestamp')['Momentum Score'].mean().reset_index().sort_values('Timestamp', ascending=False)
+def get_average_momentum(hours):
+    # Complete cycles only, averaged per bar beyond the raw level
+    start = datetime.now(timezone.utc) - timedelta(hours=hours)
+    level, df = open_pyramid(hours).averages(start, width=PLOT_POINTS, exchange=EXCHANGE)
+    return df.sort_values('Timestamp', ascending=False)
 
 def update_plot(df, avg_df, hours_to_display):
     # Filter data based on selected time range
@@ -128,15 +182,15 @@ def main():
     st.title('Crypto Market Momentum Plot')
     
     # Add a slider for selecting the time range
-    hours_to_display = st.slider("Select time range to display (hours)", min_value=1, max_value=24, value=6, step=1)
+    hours_to_display = st.select_slider("Select time range to display (hours)", options=RANGE_OPTIONS, value=6)
     
     plot_placeholder = st.empty()
     
     while True:
         try:
             # Get data
-            df = get_historical_data()
-            avg_df = get_average_momentum()
+            df = get_historical_data(hours_to_display)
+            avg_df = get_average_momentum(hours_to_display)
             
             # Update plot
             fig = update_plot(df, avg_df, hours_to_display)
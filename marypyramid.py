@@ -0,0 +1,144 @@
+import pandas as pd
+from datetime import timedelta
+import os
+from maryarchive import ROLLUPS, rollup, coarsen
+from maryindex import CsvIndex
+
+class CsvHistory:
+    """Recent score history from maryfetch's CSV backend, in the shape ScorePyramid reads from a store.
+
+    A symbol's rows come through the sidecar index (or a full parse if there is none), the market
+    average of each cycle from the completeness markers.
+    """
+
+    def __init__(self, csv_path, cycles_path):
+        self.csv_path = csv_path
+        self.cycles_path = cycles_path
+        self.index = CsvIndex(csv_path)
+
+    def series(self, symbol, start=None, end=None, exchange=None):
+        df = self.index.read(start, end, symbols=[symbol])
+        if df is None:
+            df = pd.read_csv(self.csv_path)
+            df['Timestamp'] = pd.to_datetime(df['Timestamp'], utc=True, format='ISO8601')
+            keep = df['Symbol'] == symbol
+            if start is not None:
+                keep &= df['Timestamp'] >= pd.Timestamp(start)
+            if end is not None:
+                keep &= df['Timestamp'] < pd.Timestamp(end)
+            df = df[keep]
+        if 'Exchange' not in df.columns:
+            # Files written before rows were tagged hold a single exchange
+            df['Exchange'] = exchange
+        return df[df['Exchange'] == exchange] if exchange is not None else df
+
+    def cycle_averages(self, start=None, end=None, exchange=None):
+        if not os.path.exists(self.cycles_path):
+            return pd.DataFrame({'Timestamp': pd.Series(dtype='datetime64[us, UTC]'), 'Momentum Score': pd.Series(dtype=float)})
+        df = pd.read_csv(self.cycles_path)
+        df['Timestamp'] = pd.to_datetime(df['Timestamp'], utc=True, format='ISO8601')
+        keep = pd.Series(True, index=df.index)
+        if start is not None:
+            keep &= df['Timestamp'] >= pd.Timestamp(start)
+        if end is not None:
+            keep &= df['Timestamp'] < pd.Timestamp(end)
+        if exchange is not None:
+            keep &= df['Exchange'] == exchange
+        return df.loc[keep, ['Timestamp', 'Average Momentum']].rename(columns={'Average Momentum': 'Momentum Score'})
+
+class ScorePyramid:
+    """Score history read at the coarsest resolution a plot can still show.
+
+    Levels are the raw cycles, then 5-minute, 1-hour and 1-day bars. level_for() picks the finest
+    level that gives no more points than the plot is wide. A range that starts before the live
+    rows do only gets the levels the archive still keeps that far back. Bars come precomputed
+    from the archive up to its last rolled-up hour; only the rows since then are read from
+    `live` (a store, the score ring or CsvHistory) and rolled up on the fly. Raw rows come from
+    the archive and `live` alike.
+    Bars carry OHLC plus their Mean, which is also returned as the Momentum Score to plot.
+    Given maryfetch's SummaryTable, recent market averages come from its per-cycle rows whenever
+    they reach back far enough, instead of being aggregated from `live`.
+    """
+
+    def __init__(self, live, archive=None, cycle_period=60, summary=None):
+        self.live = live
+        self.archive = archive
+        self.summary = summary
+        self.steps = {"raw": timedelta(seconds=cycle_period), "5m": timedelta(minutes=5), "1h": timedelta(hours=1), "1d": timedelta(days=1)}
+
+    def covers(self, level, start):
+        # Whether the archive's `level` reaches back as far as its best-kept level does for this range.
+        # A range the live rows hold entirely needs nothing from the archive.
+        if self.archive is None:
+            return True
+        archived = self.archive.archived_until()
+        if archived is None or pd.Timestamp(start) > archived:
+            return True
+        oldest = {name: self.archive.oldest(name) for name in self.steps}
+        known = [day for day in oldest.values() if day is not None]
+        if not known:
+            return True
+        return oldest[level] is not None and oldest[level] <= max(pd.Timestamp(start).floor('D'), min(known))
+
+    def level_for(self, start, end, width):
+        for level, step in self.steps.items():
+            if (end - start) / step <= width and self.covers(level, start):
+                return level
+        return "1d"
+
+    def split(self, level, start, end):
+        # Where archived data stops and live rows take over for `level`
+        if self.archive is None:
+            return start
+        if level == "raw":
+            # Raw rows only reach the archive as they leave the live data
+            return start
+        rolled = self.archive.rolled_until()
+        return start if rolled is None else min(max(start, rolled), end)
+
+    def series(self, symbol, start, end=None, width=1000, exchange=None):
+        # (level, rows) of one symbol's scores in [start, end) at the level level_for() picks
+        end = pd.Timestamp(end) if end is not None else pd.Timestamp.now(tz='UTC')
+        start = pd.Timestamp(start)
+        level = self.level_for(start, end, width)
+        split = self.split(level, start, end)
+        parts = []
+        if self.archive is not None:
+            parts.append(self.archive.read(level, start, end if level == "raw" else split, symbols=[symbol], exchange=exchange))
+        live = self.live.series(symbol, split, end, exchange)
+        if level == "raw":
+            parts.append(live)
+            parts = [part[['Timestamp', 'Exchange', 'Symbol', 'Momentum Score']] for part in parts if not part.empty]
+            if not parts:
+                return level, pd.DataFrame(columns=['Timestamp', 'Exchange', 'Symbol', 'Momentum Score'])
+            return level, pd.concat(parts, ignore_index=True).sort_values('Timestamp', kind='stable').reset_index(drop=True)
+        if not live.empty:
+            parts.append(rollup(live, ROLLUPS[level]))
+        parts = [part for part in parts if not part.empty]
+        if not parts:
+            return level, pd.DataFrame(columns=['Timestamp', 'Exchange', 'Symbol', 'Open', 'High', 'Low', 'Close', 'Mean', 'Samples', 'Momentum Score'])
+        bars = coarsen(pd.concat(parts, ignore_index=True))
+        bars['Momentum Score'] = bars['Mean']
+        return level, bars
+
+    def averages(self, start, end=None, width=1000, exchange=None):
+        # (level, rows) of the market average in [start, end): per cycle at raw level, else per bar
+        end = pd.Timestamp(end) if end is not None else pd.Timestamp.now(tz='UTC')
+        start = pd.Timestamp(start)
+        level = self.level_for(start, end, width)
+        split = self.split(level, start, end)
+        parts = []
+        if self.archive is not None:
+            parts.append(self.archive.averages(level, start, end if level == "raw" else split, exchange))
+        source = self.summary if self.summary is not None and self.summary.covers(split) else self.live
+        live = source.cycle_averages(split, end, exchange).assign(Samples=1)
+        if level != "raw" and not live.empty:
+            grouped = live.groupby(live['Timestamp'].dt.floor(ROLLUPS[level]))
+            live = pd.DataFrame({'Momentum Score': grouped['Momentum Score'].mean(), 'Samples': grouped.size()}).reset_index()
+        parts = [part for part in parts + [live] if not part.empty]
+        if not parts:
+            return level, pd.DataFrame({'Timestamp': pd.Series(dtype='datetime64[us, UTC]'), 'Momentum Score': pd.Series(dtype=float)})
+        df = pd.concat(parts, ignore_index=True)
+        df['Total'] = df['Momentum Score'] * df['Samples']
+        grouped = df.groupby('Timestamp', sort=True)
+        return level, (grouped['Total'].sum() / grouped['Samples'].sum()).rename('Momentum Score').reset_index()
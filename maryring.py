@@ -0,0 +1,175 @@
+import numpy as np
+import pandas as pd
+import logging
+import os
+from marystore import COLUMNS, empty_frame
+
+MAGIC = b"MARYRING"
+VERSION = 1
+# Marks a slot or symbol without a score
+EMPTY = np.iinfo(np.int16).min
+HEADER = np.dtype([
+    ('magic', 'S8'),
+    ('version', '<u4'),
+    ('period', '<u4'),
+    ('slots', '<u4'),
+    ('symbol_count', '<u4'),
+    ('scale', '<u4'),
+    ('reserved', 'V12'),
+    ('exchange', 'S16'),
+    ('latest', '<i8'),
+])
+
+def to_fixed(values, scale):
+    # Round to int16 fixed point; NaN becomes EMPTY
+    values = np.asarray(values, dtype=np.float64)
+    fixed = np.clip(np.rint(np.nan_to_num(values) * scale), -np.iinfo(np.int16).max, np.iinfo(np.int16).max)
+    return np.where(np.isnan(values), EMPTY, fixed).astype(np.int16)
+
+class ScoreRing:
+    """Rolling window of momentum scores in one memory-mapped file, one fixed slot per cycle.
+
+    The file holds a 64-byte header (magic, slot period, slot and symbol counts, fixed-point
+    scale, exchange, newest timestamp), the symbol names, then per slot an int64 epoch
+    timestamp, the int16 Average Momentum and an int16 row of scores. Values are stored as
+    round(value * scale), so the tenths the ratings add up to stay exact. A cycle lands in
+    slot (timestamp // period) % slots, overwriting the cycle one window earlier. Readers map
+    the file read-only and slice it in place. If the symbols or the layout change, the old
+    file is archived under a timestamped name and a new one is started.
+
+    Offers the read side of marystore.PartitionedStore's interface, so the dashboards can use it.
+    """
+
+    def __init__(self, path, symbols=None, exchange="", period=60, window=86400, scale=1000):
+        self.path = path
+        self.symbols = None if symbols is None else list(symbols)
+        self.exchange = exchange
+        self.period = period
+        self.slots = window // period
+        self.scale = scale
+
+    def read_header(self):
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < HEADER.itemsize:
+            return None
+        header = np.fromfile(self.path, dtype=HEADER, count=1)[0]
+        return header if header['magic'] == MAGIC and header['version'] == VERSION else None
+
+    def layout(self, header):
+        symbol_count, slots = int(header['symbol_count']), int(header['slots'])
+        return np.dtype([
+            ('header', HEADER),
+            ('symbols', 'S32', (symbol_count,)),
+            ('timestamps', '<i8', (slots,)),
+            ('averages', '<i2', (slots,)),
+            ('scores', '<i2', (slots, symbol_count)),
+        ])
+
+    def map(self, mode='r'):
+        # The whole file as one record whose fields are views into the mapping; nothing is parsed or copied
+        header = self.read_header()
+        if header is None:
+            return None
+        return np.memmap(self.path, dtype=self.layout(header), mode=mode, shape=(1,))[0]
+
+    def create(self):
+        header = np.zeros((), dtype=HEADER)
+        header['magic'] = MAGIC
+        header['version'] = VERSION
+        header['period'] = self.period
+        header['slots'] = self.slots
+        header['symbol_count'] = len(self.symbols)
+        header['scale'] = self.scale
+        header['exchange'] = self.exchange.encode()
+        # Build it under a temporary name so readers never map a half-initialised file
+        tmp_path = f"{self.path}.tmp"
+        ring = np.memmap(tmp_path, dtype=self.layout(header), mode='w+', shape=(1,))
+        ring['header'] = header
+        ring['symbols'] = [symbol.encode() for symbol in self.symbols]
+        ring['averages'] = EMPTY
+        ring['scores'] = EMPTY
+        ring.flush()
+        del ring
+        os.replace(tmp_path, self.path)
+
+    def prepare_for_write(self):
+        ring = self.map()
+        if ring is not None:
+            header = ring['header']
+            layout = (int(header['period']), int(header['slots']), int(header['scale']), header['exchange'].decode())
+            if layout == (self.period, self.slots, self.scale, self.exchange) and list(np.char.decode(ring['symbols'])) == self.symbols:
+                return
+            suffix = int(os.path.getmtime(self.path))
+            logging.info(f"Score ring layout changed, archiving {self.path} as {self.path}.{suffix}")
+            del ring
+            os.replace(self.path, f"{self.path}.{suffix}")
+        self.create()
+
+    def write(self, timestamp, scores, average):
+        # `scores` follow self.symbols, NaN where a symbol had no rating
+        self.prepare_for_write()
+        ring = self.map('r+')
+        slot = int(timestamp // self.period) % self.slots
+        # Readers skip a slot whose timestamp is 0, so they never see it half rewritten
+        ring['timestamps'][slot] = 0
+        ring['scores'][slot] = to_fixed(scores, self.scale)
+        ring['averages'][slot] = to_fixed(average, self.scale)
+        ring['timestamps'][slot] = int(timestamp)
+        ring['header']['latest'] = max(int(ring['header']['latest']), int(timestamp))
+
+    def window(self, start=None, end=None, exchange=None):
+        # (mapped ring, slots with start <= timestamp < end oldest first), or (None, []) if nothing matches
+        ring = self.map()
+        if ring is None or (exchange is not None and ring['header']['exchange'].decode() != exchange):
+            return None, []
+        timestamps = ring['timestamps']
+        keep = timestamps > 0
+        if start is not None:
+            keep &= timestamps >= int(pd.Timestamp(start).timestamp())
+        if end is not None:
+            keep &= timestamps < int(pd.Timestamp(end).timestamp())
+        slots = np.flatnonzero(keep)
+        return ring, slots[np.argsort(timestamps[slots], kind='stable')]
+
+    def read(self, start=None, end=None, symbols=None, exchange=None, columns=None):
+        ring, slots = self.window(start, end, exchange)
+        if not len(slots):
+            return empty_frame(columns)
+        names = np.char.decode(ring['symbols'])
+        picked = np.arange(len(names)) if symbols is None else np.flatnonzero(np.isin(names, list(symbols)))
+        fixed = ring['scores'][slots][:, picked]
+        cycle_rows, symbol_columns = np.nonzero(fixed != EMPTY)
+        scale = float(ring['header']['scale'])
+        timestamps = ring['timestamps'][slots][cycle_rows]
+        averages = ring['averages'][slots][cycle_rows]
+        df = pd.DataFrame({
+            'Symbol': names[picked][symbol_columns],
+            'Momentum Score': fixed[cycle_rows, symbol_columns] / scale,
+            'Timestamp': pd.to_datetime(timestamps * 1_000_000, unit='us', utc=True),
+            'Average Momentum': np.where(averages == EMPTY, np.nan, averages / scale),
+            'Exchange': ring['header']['exchange'].decode(),
+            'Cycle': timestamps,
+            'Complete': True,
+        })
+        return df[columns or COLUMNS]
+
+    def latest_cycle(self, exchange=None, complete=False):
+        # Every cycle in the ring is complete
+        ring = self.map()
+        if ring is None:
+            return empty_frame()
+        return self.read(start=pd.Timestamp(int(ring['header']['latest']), unit='s', tz='UTC'), exchange=exchange)
+
+    def series(self, symbol, start=None, end=None, exchange=None):
+        return self.read(start, end, symbols=[symbol], exchange=exchange)
+
+    def cycle_averages(self, start=None, end=None, exchange=None):
+        # Average Momentum of every cycle, by Timestamp
+        ring, slots = self.window(start, end, exchange)
+        if not len(slots):
+            return pd.DataFrame({'Timestamp': pd.Series(dtype='datetime64[us, UTC]'), 'Momentum Score': pd.Series(dtype=float)})
+        averages = ring['averages'][slots]
+        slots = slots[averages != EMPTY]
+        return pd.DataFrame({
+            'Timestamp': pd.to_datetime(ring['timestamps'][slots] * 1_000_000, unit='us', utc=True),
+            'Momentum Score': ring['averages'][slots] / float(ring['header']['scale']),
+        })
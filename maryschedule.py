@@ -0,0 +1,221 @@
+from tradingview_ta import Interval
+from datetime import datetime, timezone
+from collections import deque
+import pandas as pd
+import numpy as np
+import threading
+import time
+
+# Bar length in seconds for each TradingView interval
+INTERVAL_SECONDS = {
+    Interval.INTERVAL_1_MINUTE: 60,
+    Interval.INTERVAL_5_MINUTES: 5 * 60,
+    Interval.INTERVAL_15_MINUTES: 15 * 60,
+    Interval.INTERVAL_30_MINUTES: 30 * 60,
+    Interval.INTERVAL_1_HOUR: 60 * 60,
+    Interval.INTERVAL_2_HOURS: 2 * 60 * 60,
+    Interval.INTERVAL_4_HOURS: 4 * 60 * 60,
+    Interval.INTERVAL_1_DAY: 24 * 60 * 60,
+    Interval.INTERVAL_1_WEEK: 7 * 24 * 60 * 60,
+}
+
+# Weekly bars open on Monday 00:00 UTC; the epoch was a Thursday
+WEEK_OFFSET = 4 * 24 * 60 * 60
+
+def bar_open(interval, now):
+    # Epoch seconds at which the bar containing `now` opened
+    if interval == Interval.INTERVAL_1_MONTH:
+        current = datetime.fromtimestamp(now, timezone.utc)
+        return datetime(current.year, current.month, 1, tzinfo=timezone.utc).timestamp()
+    length = INTERVAL_SECONDS[interval]
+    offset = WEEK_OFFSET if interval == Interval.INTERVAL_1_WEEK else 0
+    return now - (now - offset) % length
+
+def bar_close(interval, now):
+    # Epoch seconds at which the bar containing `now` closes
+    if interval == Interval.INTERVAL_1_MONTH:
+        current = datetime.fromtimestamp(now, timezone.utc)
+        return datetime(current.year + current.month // 12, current.month % 12 + 1, 1, tzinfo=timezone.utc).timestamp()
+    return bar_open(interval, now) + INTERVAL_SECONDS[interval]
+
+class RefreshScheduler:
+    """Holds the freshest rating per symbol/interval and decides which ones need refetching.
+
+    A symbol/interval is due when a bar has closed since it was last fetched, or
+    when the value held is older than the interval's staleness budget. A value whose
+    refetches keep failing is handed out for at most `max_age` seconds past the longest
+    it may go unrefreshed, so a dead symbol drops out instead of keeping a frozen score.
+    """
+
+    def __init__(self, max_staleness=None, max_age=None):
+        self.max_staleness = max_staleness or {}
+        self.max_age = max_age
+        self.latest = {}
+        self.lock = threading.Lock()
+
+    def is_due(self, symbol, interval, now):
+        entry = self.latest.get((symbol, interval))
+        if entry is None:
+            return True
+        fetched_at = entry[0]
+        if fetched_at < bar_open(interval, now):
+            return True
+        budget = self.budget(symbol, interval)
+        return budget is not None and now - fetched_at >= budget
+
+    def budget(self, symbol, interval):
+        # Staleness budget in seconds; symbol None asks for the strictest one across symbols
+        return self.max_staleness.get(interval)
+
+    def due(self, symbols, intervals, now):
+        with self.lock:
+            return [(symbol, interval) for symbol in symbols for interval in intervals if self.is_due(symbol, interval, now)]
+
+    def fresh_after(self, interval, now):
+        # Oldest fetch time that still satisfies this interval's refresh rules, e.g. for a cache lookup
+        threshold = bar_open(interval, now)
+        budget = self.budget(None, interval)
+        if budget is not None:
+            threshold = max(threshold, now - budget)
+        return threshold
+
+    def store(self, symbol, interval, value, fetched_at):
+        with self.lock:
+            self.latest[(symbol, interval)] = (fetched_at, value)
+
+    def longest_budget(self, interval):
+        # Longest any symbol may go between fetches of this interval: its budget, else the bar
+        budget = self.max_staleness.get(interval)
+        return budget if budget is not None else INTERVAL_SECONDS.get(interval, 31 * 24 * 60 * 60)
+
+    def freshest(self, symbol, interval, now=None):
+        entry = self.latest.get((symbol, interval))
+        if entry is None:
+            return None
+        if now is not None and self.max_age is not None and now - entry[0] > self.longest_budget(interval) + self.max_age:
+            return None
+        return entry[1]
+
+def percentile_rank(values):
+    # Rank in (0, 1], ties sharing the same rank
+    return pd.Series(values, dtype=float).rank(pct=True).to_numpy()
+
+class PriorityScheduler(RefreshScheduler):
+    """RefreshScheduler that refetches fast-moving symbols more often than quiet ones.
+
+    After every cycle observe() ranks symbols by how far their score moves per cycle (its
+    own changes plus its moves through the cross-sectional ranking), boosted when a score
+    sits within one such move of a threshold or the cycle average. The top `hot_share` of
+    them are hot and get `hot_scale` times the staleness budget, the rest `cold_scale` times
+    it. A closed bar still makes every symbol due, and the cold budget is the refresh every
+    symbol is guaranteed. Refreshes driven by hot symbols fetch a full `batch_size` batch of
+    the highest-priority symbols, which costs no more requests than the hot ones alone.
+    A symbol without a rating, or asked for and never stored since (no rating came back, its
+    breaker is open, the deadline cut it), is retried on its own and never drags the rest along.
+    """
+
+    def __init__(self, max_staleness=None, hot_share=0.2, hot_scale=1.0, cold_scale=3.0, thresholds=(), window=10, batch_size=None, max_age=None):
+        super().__init__(max_staleness, max_age)
+        self.hot_share = hot_share
+        self.hot_scale = hot_scale
+        self.cold_scale = cold_scale
+        self.thresholds = tuple(thresholds)
+        self.window = window
+        self.batch_size = batch_size
+        self.last = {}
+        self.moves = {}
+        self.priority_order = []
+        self.hot = set()
+        self.pending = set()
+
+    def budget(self, symbol, interval):
+        budget = self.max_staleness.get(interval)
+        if budget is None:
+            return None
+        if symbol is None:
+            return budget * min(self.hot_scale, self.cold_scale)
+        return budget * (self.hot_scale if symbol in self.hot else self.cold_scale)
+
+    def longest_budget(self, interval):
+        budget = self.max_staleness.get(interval)
+        if budget is None:
+            return super().longest_budget(interval)
+        return budget * max(self.hot_scale, self.cold_scale)
+
+    def due(self, symbols, intervals, now):
+        # Per interval, a closed bar or a spent cold budget refreshes every symbol together, so
+        # the quiet ones keep sharing requests. Otherwise a hot symbol past its budget triggers a
+        # refresh of the hot symbols only, topped up to a full batch in priority order.
+        wanted = set(symbols)
+        ranked = [symbol for symbol in self.priority_order if symbol in wanted]
+        ranked_set = set(ranked)
+        ranked += [symbol for symbol in symbols if symbol not in ranked_set]
+        due = []
+        with self.lock:
+            for interval in intervals:
+                stale = [symbol for symbol in symbols if self.is_due(symbol, interval, now)]
+                lagging = {symbol for symbol in stale if self.lagging(symbol, interval)}
+                triggers = [symbol for symbol in stale if symbol not in lagging]
+                if not triggers:
+                    picked = []
+                elif any(symbol not in self.hot for symbol in triggers):
+                    picked = list(symbols)
+                else:
+                    count = max(len(self.hot & wanted), 1)
+                    if self.batch_size:
+                        count += -count % self.batch_size
+                    picked = ranked[:count]
+                picked_set = set(picked)
+                picked += [symbol for symbol in stale if symbol in lagging and symbol not in picked_set]
+                self.pending.update((symbol, interval) for symbol in picked)
+                due.extend((symbol, interval) for symbol in picked)
+        return due
+
+    def lagging(self, symbol, interval):
+        # No rating held, or asked for since the last one was stored without a new one arriving
+        return (symbol, interval) not in self.latest or (symbol, interval) in self.pending
+
+    def store(self, symbol, interval, value, fetched_at):
+        with self.lock:
+            self.latest[(symbol, interval)] = (fetched_at, value)
+            self.pending.discard((symbol, interval))
+
+    def observe(self, symbols, scores, average=None):
+        # Re-rank the symbols from one cycle's scores; returns the new hot set
+        if not len(symbols):
+            return self.hot
+        scores = np.asarray(scores, dtype=float)
+        thresholds = self.thresholds + ((average,) if average is not None and not np.isnan(average) else ())
+        ranks = percentile_rank(scores)
+        spread = scores.std()
+        priority = np.zeros(len(symbols))
+        with self.lock:
+            for position, (symbol, score, rank) in enumerate(zip(symbols, scores, ranks)):
+                # Typical move per cycle over the window, in score units
+                moves = self.moves.setdefault(symbol, deque(maxlen=self.window))
+                if symbol in self.last:
+                    last_score, last_rank = self.last[symbol]
+                    moves.append(abs(score - last_score) + abs(rank - last_rank) * spread)
+                self.last[symbol] = (score, rank)
+                move = np.mean(moves) if moves else 0.0
+                distance = min((abs(score - threshold) for threshold in thresholds), default=np.inf)
+                priority[position] = move * (1 + np.exp(-distance / move)) if move > 0 else 0.0
+
+            order = np.argsort(-priority, kind='stable')
+            self.priority_order = [symbols[i] for i in order]
+            self.hot = set(self.priority_order[:int(round(len(symbols) * self.hot_share))])
+        return self.hot
+
+def next_boundary(period, now):
+    # First wall-clock multiple of `period` seconds after `now`
+    return (now // period + 1) * period
+
+def sleep_until(target):
+    delay = target - time.time()
+    if delay > 0:
+        time.sleep(delay)
+
+def shed_order(intervals):
+    # Intervals most worth fetching first: highest weight, then shortest bar (changes fastest).
+    # Work is queued in this order, so the ones cut by a deadline are the lowest-weight ones.
+    return sorted(intervals, key=lambda interval: (-intervals[interval], INTERVAL_SECONDS.get(interval, float('inf'))))
@@ -0,0 +1,44 @@
+import numpy as np
+
+# Marks a symbol/interval without a rating in an int8 rating matrix
+MISSING = np.iinfo(np.int8).min
+
+def rating_matrix(data, symbols, intervals):
+    # Encode {symbol: {interval: Rating}} as an int8 (symbols x intervals) matrix of rating codes
+    ratings = np.full((len(symbols), len(intervals)), MISSING, dtype=np.int8)
+    for row, symbol in enumerate(symbols):
+        symbol_data = data.get(symbol, {})
+        for column, interval in enumerate(intervals):
+            rating = symbol_data.get(interval)
+            if rating is not None:
+                ratings[row, column] = rating.code
+    return ratings
+
+def weight_matrix(profiles, intervals):
+    # (intervals x profiles) matrix from {profile name: {interval: weight}}; unlisted intervals weigh 0
+    return np.array([[profile.get(interval, 0.0) for profile in profiles.values()] for interval in intervals], dtype=np.float64)
+
+def score_matrix(ratings, weights):
+    """Score every symbol under every weight profile with one matrix product.
+
+    Missing ratings contribute nothing, as before. Returns the (symbols x profiles) scores,
+    a mask of symbols that had at least one rating, and the cross-sectional mean of each
+    profile over those symbols (the `Average Momentum`).
+    """
+    present = ratings != MISSING
+    codes = np.where(present, ratings, 0).astype(np.float64)
+    scores = codes @ weights
+    valid = present.any(axis=1)
+    averages = scores[valid].mean(axis=0) if valid.any() else np.full(weights.shape[1], np.nan)
+    return scores, valid, averages
+
+def count_matrix(data, symbols, intervals):
+    # uint8 (symbols x intervals x 3) matrix of the summary BUY/SELL/NEUTRAL indicator counts
+    counts = np.zeros((len(symbols), len(intervals), 3), dtype=np.uint8)
+    for row, symbol in enumerate(symbols):
+        symbol_data = data.get(symbol, {})
+        for column, interval in enumerate(intervals):
+            rating = symbol_data.get(interval)
+            if rating is not None:
+                counts[row, column] = (rating.buy, rating.sell, rating.neutral)
+    return counts
@@ -0,0 +1,136 @@
+import numpy as np
+from maryscore import MISSING
+import logging
+import atexit
+import zlib
+import uuid
+import time
+import os
+
+def shard_of(symbol, shard_count):
+    # Stable across processes and restarts, unlike hash()
+    return zlib.crc32(symbol.encode()) % shard_count
+
+class ShardCoordinator:
+    """Splits the symbol universe between fetcher processes that share a directory.
+
+    Each process claims a numbered lease file and refreshes it every cycle. The live leases,
+    in slot order, decide every process's shard: a symbol belongs to the worker whose rank
+    equals shard_of(symbol, live workers). Adding a worker re-partitions on the next cycle.
+    Workers publish each cycle's ratings to the directory; the lowest live slot is the
+    merger, which collects every shard and writes the combined cycle.
+    """
+
+    def __init__(self, directory, lease_ttl=180, max_slots=64):
+        self.directory = directory
+        self.lease_ttl = lease_ttl
+        self.max_slots = max_slots
+        self.token = uuid.uuid4().hex
+        self.slot = None
+        os.makedirs(directory, exist_ok=True)
+
+    def lease_path(self, slot):
+        return os.path.join(self.directory, f"worker-{slot}.lease")
+
+    def is_live(self, slot):
+        try:
+            return time.time() - os.path.getmtime(self.lease_path(slot)) < self.lease_ttl
+        except OSError:
+            return False
+
+    def owns(self, slot):
+        try:
+            with open(self.lease_path(slot)) as f:
+                return f.read() == self.token
+        except OSError:
+            return False
+
+    def claim(self):
+        for slot in range(self.max_slots):
+            path = self.lease_path(slot)
+            if self.is_live(slot):
+                continue
+            # Free or stale (its worker died): take it over, then check no one else did too
+            tmp_path = f"{path}.{self.token}"
+            with open(tmp_path, 'w') as f:
+                f.write(self.token)
+            os.replace(tmp_path, path)
+            time.sleep(0.05)
+            if self.owns(slot):
+                self.slot = slot
+                atexit.register(self.release)
+                logging.info(f"Claimed shard lease {slot} in {self.directory}")
+                return slot
+        raise RuntimeError(f"No free shard lease in {self.directory}")
+
+    def heartbeat(self):
+        if self.slot is None or not self.owns(self.slot):
+            if self.slot is not None:
+                logging.warning(f"Lost shard lease {self.slot}, claiming a new one")
+            self.claim()
+        os.utime(self.lease_path(self.slot))
+
+    def release(self):
+        if self.slot is not None and self.owns(self.slot):
+            os.remove(self.lease_path(self.slot))
+        self.slot = None
+
+    def members(self):
+        return [slot for slot in range(self.max_slots) if slot == self.slot or self.is_live(slot)]
+
+    def assignment(self, symbols):
+        # (this worker's symbols, live member slots, whether this worker merges the cycle)
+        self.heartbeat()
+        members = self.members()
+        rank = members.index(self.slot)
+        shard = [symbol for symbol in symbols if shard_of(symbol, len(members)) == rank]
+        return shard, members, rank == 0
+
+    def cycle_path(self, cycle_id, slot, name=""):
+        # `name` tells apart the parts of one cycle, e.g. one per fetch job
+        suffix = f".{name}" if name else ""
+        return os.path.join(self.directory, f"cycle-{int(cycle_id)}-{slot}{suffix}.npz")
+
+    def publish(self, cycle_id, symbols, codes, counts, name=""):
+        path = self.cycle_path(cycle_id, self.slot, name)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, symbols=np.array(symbols, dtype=str), codes=codes, counts=counts)
+        os.replace(tmp_path, path)
+
+    def collect(self, cycle_id, slots, deadline, name=""):
+        # Wait until every slot has published this cycle or the deadline (epoch seconds) passes
+        parts = {}
+        while True:
+            for slot in slots:
+                path = self.cycle_path(cycle_id, slot, name)
+                if slot not in parts and os.path.exists(path):
+                    with np.load(path) as part:
+                        parts[slot] = (list(part['symbols']), part['codes'], part['counts'])
+            if len(parts) == len(slots) or time.time() >= deadline:
+                break
+            time.sleep(0.2)
+        missing = [slot for slot in slots if slot not in parts]
+        if missing:
+            logging.warning(f"Shards {missing} did not publish cycle {int(cycle_id)}{f' ({name})' if name else ''} in time")
+        return list(parts.values())
+
+    def cleanup(self, before_cycle_id):
+        for name in os.listdir(self.directory):
+            if name.startswith("cycle-"):
+                try:
+                    if int(name.split("-")[1]) < before_cycle_id:
+                        os.remove(os.path.join(self.directory, name))
+                except (ValueError, OSError):
+                    pass
+
+def merge(parts, symbols, interval_count):
+    # Lay every shard's (symbols, codes, counts) into one matrix pair in universe order
+    index = {symbol: row for row, symbol in enumerate(symbols)}
+    codes = np.full((len(symbols), interval_count), MISSING, dtype=np.int8)
+    counts = np.zeros((len(symbols), interval_count, 3), dtype=np.uint8)
+    for part_symbols, part_codes, part_counts in parts:
+        keep = [position for position, symbol in enumerate(part_symbols) if symbol in index]
+        rows = [index[part_symbols[position]] for position in keep]
+        codes[rows] = part_codes[keep]
+        counts[rows] = part_counts[keep]
+    return codes, counts
@@ -0,0 +1,105 @@
+import pandas as pd
+import numpy as np
+import logging
+import json
+import os
+from maryscore import MISSING, weight_matrix
+
+class SnapshotStore:
+    """Append-only store of the raw per-cycle ratings behind momentum_scores.csv.
+
+    Each cycle is one fixed-size record: an int64 epoch timestamp, the int8 (symbols x intervals)
+    rating codes and the uint8 BUY/SELL/NEUTRAL counts. Records live in `<path>.bin`; the symbol
+    and interval layout lives in `<path>.json`. If the layout changes, the old pair is archived
+    under a timestamped name and a new one is started.
+    """
+
+    def __init__(self, path, symbols=None, intervals=None):
+        self.path = path
+        self.data_path = f"{path}.bin"
+        self.header_path = f"{path}.json"
+        header = self.read_header()
+        if symbols is None or intervals is None:
+            if header is None:
+                raise FileNotFoundError(f"No snapshot header at {self.header_path}")
+            symbols, intervals = header['symbols'], header['intervals']
+        self.symbols = list(symbols)
+        self.intervals = list(intervals)
+        self.dtype = np.dtype([
+            ('timestamp', '<i8'),
+            ('codes', 'i1', (len(self.symbols), len(self.intervals))),
+            ('counts', 'u1', (len(self.symbols), len(self.intervals), 3)),
+        ])
+
+    def read_header(self):
+        if not os.path.exists(self.header_path):
+            return None
+        with open(self.header_path) as f:
+            return json.load(f)
+
+    def prepare_for_append(self):
+        header = self.read_header()
+        if header is not None and (header['symbols'] != self.symbols or header['intervals'] != self.intervals):
+            suffix = int(os.path.getmtime(self.header_path))
+            logging.info(f"Snapshot layout changed, archiving {self.data_path} as {self.path}.{suffix}.bin")
+            if os.path.exists(self.data_path):
+                os.replace(self.data_path, f"{self.path}.{suffix}.bin")
+            os.replace(self.header_path, f"{self.path}.{suffix}.json")
+            header = None
+        if header is None:
+            with open(self.header_path, 'w') as f:
+                json.dump({'symbols': self.symbols, 'intervals': self.intervals}, f)
+        # Drop a partial record left by an interrupted write so records stay aligned
+        if os.path.exists(self.data_path):
+            size = os.path.getsize(self.data_path)
+            if size % self.dtype.itemsize:
+                with open(self.data_path, 'r+b') as f:
+                    f.truncate(size - size % self.dtype.itemsize)
+
+    def append(self, timestamp, codes, counts):
+        self.prepare_for_append()
+        record = np.zeros(1, dtype=self.dtype)
+        record['timestamp'] = int(timestamp)
+        record['codes'] = codes
+        record['counts'] = counts
+        with open(self.data_path, 'ab') as f:
+            f.write(record.tobytes())
+
+    def load(self):
+        # Memory-map every complete record; nothing is parsed or copied
+        if not os.path.exists(self.data_path):
+            return np.zeros(0, dtype=self.dtype)
+        cycles = os.path.getsize(self.data_path) // self.dtype.itemsize
+        if cycles == 0:
+            return np.zeros(0, dtype=self.dtype)
+        return np.memmap(self.data_path, dtype=self.dtype, mode='r', shape=(cycles,))
+
+    def rescore(self, profiles):
+        """Rebuild the full score history for each named {interval: weight} profile in one pass.
+
+        Returns {profile name: DataFrame} in the momentum_scores.csv layout
+        (Symbol, Momentum Score, Timestamp, Average Momentum).
+        """
+        records = self.load()
+        cycles, symbol_count = len(records), len(self.symbols)
+        codes = records['codes'].reshape(cycles * symbol_count, len(self.intervals))
+        present = codes != MISSING
+        scores = np.where(present, codes, 0).astype(np.float64) @ weight_matrix(profiles, self.intervals)
+        valid = present.any(axis=1)
+        
+        # Per-cycle cross-sectional means over the symbols that had any rating
+        per_cycle = scores.reshape(cycles, symbol_count, -1) * valid.reshape(cycles, symbol_count, 1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            averages = per_cycle.sum(axis=1) / valid.reshape(cycles, symbol_count).sum(axis=1, keepdims=True)
+        
+        timestamps = pd.to_datetime(np.repeat(records['timestamp'], symbol_count), unit='s', utc=True)
+        symbols = np.tile(np.array(self.symbols), cycles)
+        results = {}
+        for column, name in enumerate(profiles):
+            results[name] = pd.DataFrame({
+                'Symbol': symbols[valid],
+                'Momentum Score': scores[valid, column],
+                'Timestamp': timestamps[valid],
+                'Average Momentum': np.repeat(averages[:, column], symbol_count)[valid],
+            })
+        return results
@@ -0,0 +1,131 @@
+from sqlalchemy import MetaData, Table, Column, Index, Integer, BigInteger, String, Float, DateTime, Boolean, create_engine, event, select, func
+import pandas as pd
+from marystore import COLUMNS, empty_frame, resolve
+
+# DataFrame column -> SQL column
+SQL_NAMES = {
+    "Symbol": "symbol",
+    "Momentum Score": "momentum_score",
+    "Timestamp": "timestamp",
+    "Average Momentum": "average_momentum",
+    "Exchange": "exchange",
+    "Cycle": "cycle",
+    "Complete": "complete",
+}
+
+metadata = MetaData()
+scores = Table(
+    "momentum_scores", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("symbol", String(32), nullable=False),
+    Column("momentum_score", Float, nullable=False),
+    Column("timestamp", DateTime, nullable=False),
+    Column("average_momentum", Float),
+    Column("exchange", String(32), nullable=False),
+    Column("cycle", BigInteger, nullable=False),
+    Column("complete", Boolean, nullable=False),
+    Index("ix_momentum_scores_timestamp_symbol", "timestamp", "symbol"),
+    Index("ix_momentum_scores_symbol_timestamp", "symbol", "timestamp"),
+    Index("ix_momentum_scores_exchange_cycle", "exchange", "cycle"),
+)
+
+def naive_utc(timestamp):
+    # Timestamps are stored as naive UTC, which every backend compares the same way
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert('UTC').tz_localize(None)
+    return timestamp.to_pydatetime()
+
+class SqlStore:
+    """Momentum score rows in one indexed SQL table, through SQLAlchemy.
+
+    Takes any SQLAlchemy URL: sqlite:///momentum_scores.db locally, or a
+    postgresql+psycopg2:// URL. Every write is one bulk insert in a transaction, and writing
+    a cycle's complete rows also deletes the partial rows streamed for it. Queries filter on
+    the (timestamp, symbol) and (symbol, timestamp) indexes, so readers only fetch the rows
+    they show. Shares its interface with marystore.PartitionedStore.
+    """
+
+    def __init__(self, url):
+        if url.startswith("sqlite"):
+            # Several fetcher processes write while the dashboards read
+            self.engine = create_engine(url, connect_args={"timeout": 30})
+            event.listen(self.engine, "connect", lambda conn, record: conn.execute("PRAGMA journal_mode=WAL"))
+        else:
+            self.engine = create_engine(url, pool_pre_ping=True)
+        metadata.create_all(self.engine)
+
+    def write(self, df, complete=True):
+        df = df.assign(Complete=complete)
+        df['Timestamp'] = pd.to_datetime(df['Timestamp'], utc=True, format='ISO8601').dt.tz_localize(None)
+        df = df[COLUMNS].rename(columns=SQL_NAMES).astype(object)
+        records = df.where(df.notna(), None).to_dict('records')
+        if not records:
+            return
+        with self.engine.begin() as conn:
+            if complete:
+                for exchange, cycle in set(zip(df['exchange'], df['cycle'])):
+                    conn.execute(scores.delete().where(
+                        (scores.c.exchange == exchange) & (scores.c.cycle == int(cycle)) & ~scores.c.complete
+                    ))
+            conn.execute(scores.insert(), records)
+
+    def select_rows(self):
+        return select(*[scores.c[SQL_NAMES[name]].label(name) for name in COLUMNS])
+
+    def filter(self, query, start=None, end=None, symbols=None, exchange=None):
+        if start is not None:
+            query = query.where(scores.c.timestamp >= naive_utc(start))
+        if end is not None:
+            query = query.where(scores.c.timestamp < naive_utc(end))
+        if symbols is not None:
+            query = query.where(scores.c.symbol.in_(list(symbols)))
+        if exchange is not None:
+            query = query.where(scores.c.exchange == exchange)
+        return query
+
+    def frame(self, query, columns=None):
+        with self.engine.connect() as conn:
+            result = conn.execute(query)
+            df = pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+        if df.empty:
+            return empty_frame(columns)
+        df['Timestamp'] = pd.to_datetime(df['Timestamp']).dt.tz_localize('UTC')
+        df['Average Momentum'] = df['Average Momentum'].astype(float)
+        df['Complete'] = df['Complete'].astype(bool)
+        return resolve(df)[columns or COLUMNS]
+
+    def read(self, start=None, end=None, symbols=None, exchange=None, columns=None):
+        # Rows with start <= Timestamp < end, optionally for some symbols and one exchange
+        return self.frame(self.filter(self.select_rows(), start, end, symbols, exchange), columns)
+
+    def latest_cycle(self, exchange=None, complete=False):
+        # Rows of the newest cycle, or of the newest complete one
+        latest = self.filter(select(func.max(scores.c.cycle)), exchange=exchange)
+        if complete:
+            latest = latest.where(scores.c.complete)
+        query = self.filter(self.select_rows(), exchange=exchange).where(scores.c.cycle == latest.scalar_subquery())
+        return self.frame(query)
+
+    def series(self, symbol, start=None, end=None, exchange=None):
+        return self.read(start, end, symbols=[symbol], exchange=exchange)
+
+    def cycle_averages(self, start=None, end=None, exchange=None):
+        # Mean Momentum Score of every complete cycle, by Timestamp
+        query = self.filter(
+            select(scores.c.timestamp.label('Timestamp'), func.avg(scores.c.momentum_score).label('Momentum Score')),
+            start, end, exchange=exchange
+        ).where(scores.c.complete).group_by(scores.c.timestamp).order_by(scores.c.timestamp)
+        with self.engine.connect() as conn:
+            df = pd.DataFrame(conn.execute(query).fetchall(), columns=['Timestamp', 'Momentum Score'])
+        df['Timestamp'] = pd.to_datetime(df['Timestamp']).dt.tz_localize('UTC')
+        return df
+
+    def drop(self, before):
+        # Delete every row older than `before`, e.g. once it is archived
+        with self.engine.begin() as conn:
+            conn.execute(scores.delete().where(scores.c.timestamp < naive_utc(before)))
+
+    def compact(self, before, since=None):
+        # Rows live in one indexed table and partial rows go when their cycle completes; nothing to fold
+        pass
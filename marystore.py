@@ -0,0 +1,212 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pandas as pd
+from datetime import datetime, timezone, timedelta
+import logging
+import shutil
+import uuid
+import sys
+import os
+
+SCHEMA = pa.schema([
+    ("Symbol", pa.string()),
+    ("Momentum Score", pa.float64()),
+    ("Timestamp", pa.timestamp("us", tz="UTC")),
+    ("Average Momentum", pa.float64()),
+    ("Exchange", pa.string()),
+    ("Cycle", pa.int64()),
+    ("Complete", pa.bool_()),
+])
+COLUMNS = SCHEMA.names
+
+def empty_frame(columns=None):
+    return pd.DataFrame({name: pd.Series(dtype=field.type.to_pandas_dtype()) for name, field in zip(COLUMNS, SCHEMA)})[columns or COLUMNS]
+
+def resolve(df):
+    # Partial rows of a cycle that finished are superseded by its complete rows; a reader
+    # racing a compaction or a late shard may also see a row twice
+    cycle_key = df['Exchange'] + ':' + df['Cycle'].astype(str)
+    finished = set(cycle_key[df['Complete']])
+    df = df[df['Complete'] | ~cycle_key.isin(finished)]
+    df = df.sort_values('Complete', ascending=False, kind='stable').drop_duplicates(['Exchange', 'Cycle', 'Symbol'])
+    return df.sort_values(['Timestamp', 'Symbol'], kind='stable').reset_index(drop=True)
+
+# Compacted hours are sorted by symbol and split into row groups this size, so Symbol filters skip most of them
+ROW_GROUP_SIZE = 4096
+
+class PartitionedStore:
+    """Momentum score rows in hourly Parquet partitions, read back by time window.
+
+    Rows live under <directory>/date=YYYY-MM-DD/hour=HH/. A finished cycle is written as one
+    complete file, rows streamed in while a cycle runs as small partial files. Once an hour
+    is over, compact() folds its files into one and drops the partial rows of cycles that
+    finished. read() only opens the hours inside the window and pushes its Timestamp, Symbol
+    and Exchange filters down to the Parquet row groups.
+
+    Shares its interface with marysql.SqlStore, so either can back maryfetch and the dashboards.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def partition_path(self, hour):
+        return os.path.join(self.directory, f"date={hour:%Y-%m-%d}", f"hour={hour:%H}")
+
+    def write(self, df, complete=True):
+        # Rows may span hours, e.g. when migrating; each hour gets its own file
+        df = df.assign(Complete=complete)
+        df['Timestamp'] = pd.to_datetime(df['Timestamp'], utc=True, format='ISO8601')
+        prefix = "cycle" if complete else "stream"
+        for hour, hour_df in df.groupby(df['Timestamp'].dt.floor('h')):
+            path = self.partition_path(hour)
+            os.makedirs(path, exist_ok=True)
+            name = f"{prefix}-{int(hour_df['Cycle'].iloc[0])}-{uuid.uuid4().hex[:8]}.parquet"
+            self.write_file(hour_df, os.path.join(path, name))
+
+    def write_file(self, df, path, row_group_size=None):
+        # Write-then-rename so a reader never opens a half-written file
+        table = pa.Table.from_pandas(df[COLUMNS], schema=SCHEMA, preserve_index=False)
+        pq.write_table(table, f"{path}.tmp", row_group_size=row_group_size)
+        os.replace(f"{path}.tmp", path)
+
+    def hours(self, start=None, end=None):
+        # (hour, partition path) for every stored hour overlapping [start, end)
+        found = []
+        for date_name in sorted(os.listdir(self.directory)):
+            if not date_name.startswith("date="):
+                continue
+            day = datetime.strptime(date_name[5:], "%Y-%m-%d").replace(tzinfo=timezone.utc)
+            if (start is not None and day + timedelta(days=1) <= start) or (end is not None and day >= end):
+                continue
+            for hour_name in sorted(os.listdir(os.path.join(self.directory, date_name))):
+                hour = day + timedelta(hours=int(hour_name[5:]))
+                if (start is not None and hour + timedelta(hours=1) <= start) or (end is not None and hour >= end):
+                    continue
+                found.append((hour, os.path.join(self.directory, date_name, hour_name)))
+        return found
+
+    def files(self, path):
+        return sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(".parquet"))
+
+    def read(self, start=None, end=None, symbols=None, exchange=None, columns=None):
+        # Rows with start <= Timestamp < end, optionally for some symbols and one exchange
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+        filters = []
+        if start is not None:
+            filters.append(("Timestamp", ">=", start))
+        if end is not None:
+            filters.append(("Timestamp", "<", end))
+        if symbols is not None:
+            filters.append(("Symbol", "in", list(symbols)))
+        if exchange is not None:
+            filters.append(("Exchange", "==", exchange))
+
+        tables = []
+        for hour, path in self.hours(start, end):
+            for file_path in self.files(path):
+                try:
+                    tables.append(pq.read_table(file_path, filters=filters or None, schema=SCHEMA))
+                except FileNotFoundError:
+                    # Compacted away since the listing; its rows are in the hour's new file
+                    pass
+        if not tables:
+            return empty_frame(columns)
+        return resolve(pa.concat_tables(tables).to_pandas())[columns or COLUMNS]
+
+    def latest_cycle(self, exchange=None, complete=False):
+        # Rows of the newest cycle (or newest complete one), looking back a day at most
+        hours = self.hours()
+        if not hours:
+            return empty_frame()
+        df = self.read(start=hours[-1][0] - timedelta(days=1), exchange=exchange)
+        if complete:
+            df = df[df['Complete']]
+        return df[df['Cycle'] == df['Cycle'].max()].reset_index(drop=True)
+
+    def series(self, symbol, start=None, end=None, exchange=None):
+        return self.read(start, end, symbols=[symbol], exchange=exchange)
+
+    def cycle_averages(self, start=None, end=None, exchange=None):
+        # Mean Momentum Score of every complete cycle, by Timestamp
+        df = self.read(start, end, exchange=exchange, columns=['Timestamp', 'Momentum Score', 'Complete'])
+        return df[df['Complete']].groupby('Timestamp')['Momentum Score'].mean().reset_index()
+
+    def drop(self, before):
+        # Delete every hour that ended by `before`, e.g. once it is archived
+        for hour, path in self.hours(end=before):
+            if hour + timedelta(hours=1) <= before:
+                shutil.rmtree(path)
+        for date_name in os.listdir(self.directory):
+            date_path = os.path.join(self.directory, date_name)
+            if date_name.startswith("date=") and not os.listdir(date_path):
+                os.rmdir(date_path)
+
+    def compact(self, before, since=None):
+        # Fold every hour that ended by `before` into a single sorted file
+        for hour, path in self.hours(since, before):
+            if hour + timedelta(hours=1) > before:
+                continue
+            files = self.files(path)
+            if len(files) <= 1 and all(os.path.basename(f) == "hour.parquet" for f in files):
+                continue
+            df = resolve(pa.concat_tables([pq.read_table(f, schema=SCHEMA) for f in files]).to_pandas())
+            self.write_file(df.sort_values(['Symbol', 'Timestamp'], kind='stable'), os.path.join(path, "hour.parquet"), ROW_GROUP_SIZE)
+            for file_path in files:
+                if os.path.basename(file_path) != "hour.parquet":
+                    os.remove(file_path)
+            logging.info(f"Compacted {len(files)} files for {hour:%Y-%m-%d %H}:00 into {len(df)} rows")
+
+def read_markers(cycles_path):
+    # A momentum_cycles.csv's (Cycle, Exchange, Cycle Average), or None if there is none
+    if cycles_path is None or not os.path.exists(cycles_path):
+        return None
+    return pd.read_csv(cycles_path)[['Cycle', 'Exchange', 'Average Momentum']].rename(columns={'Average Momentum': 'Cycle Average'})
+
+def mark_complete(chunk, markers, default_exchange="BYBIT"):
+    # Bring rows read from a momentum_scores.csv (any version) up to COLUMNS
+    chunk['Timestamp'] = pd.to_datetime(chunk['Timestamp'], utc=True, format='ISO8601')
+    if 'Exchange' not in chunk.columns:
+        chunk['Exchange'] = default_exchange
+    if 'Cycle' in chunk.columns and markers is not None:
+        # Streamed rows are complete once their cycle has a marker, which holds their average
+        chunk = chunk.merge(markers, on=['Cycle', 'Exchange'], how='left')
+        chunk['Complete'] = chunk['Cycle Average'].notna()
+        chunk['Average Momentum'] = chunk['Average Momentum'].fillna(chunk['Cycle Average'])
+    else:
+        # Files without cycle ids only ever held whole cycles
+        if 'Cycle' not in chunk.columns:
+            chunk['Cycle'] = (chunk['Timestamp'] - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)
+        chunk['Complete'] = True
+    return chunk[COLUMNS]
+
+def migrate_csv(csv_path, store, cycles_path=None, default_exchange="BYBIT", chunksize=100_000):
+    # Copy an append-only momentum_scores.csv (any version) into the store, then compact it
+    markers = read_markers(cycles_path)
+    rows = 0
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        chunk = mark_complete(chunk, markers, default_exchange)
+        complete = chunk['Complete']
+        store.write(chunk[complete], complete=True)
+        if not complete.all():
+            store.write(chunk[~complete], complete=False)
+        rows += len(chunk)
+
+    now = datetime.now(timezone.utc)
+    store.compact(before=now.replace(minute=0, second=0, microsecond=0))
+    logging.info(f"Migrated {rows} rows from {csv_path}")
+    return rows
+
+if __name__ == "__main__":
+    # python marystore.py migrate [momentum_scores.csv] [momentum_store | SQLAlchemy URL] [momentum_cycles.csv]
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if len(sys.argv) < 2 or sys.argv[1] != "migrate":
+        sys.exit("usage: python marystore.py migrate [csv_path] [store_directory | store_url] [cycles_path]")
+    args = sys.argv[2:] + ["momentum_scores.csv", "momentum_store", "momentum_cycles.csv"][len(sys.argv) - 2:]
+    if "://" in args[1]:
+        from marysql import SqlStore
+        target = SqlStore(args[1])
+    else:
+        target = PartitionedStore(args[1])
+    migrate_csv(args[0], target, args[2])
@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+import os
+from marytail import CsvTail
+from marysymbols import SYMBOLS, symbol_ids
+
+# Symbols listed at each end of a cycle's ranking, and the score quantiles kept next to the median
+TOP_N = 20
+QUANTILES = {"Q10": 0.1, "Q25": 0.25, "Q75": 0.75, "Q90": 0.9}
+SUMMARY_COLUMNS = ["Cycle", "Timestamp", "Exchange", "Symbols", "Mean", "Median", "Above", "Below", *QUANTILES, "Top", "Bottom"]
+
+def summarize(cycle, timestamp, exchange, symbols, scores, top=TOP_N):
+    # One summary row for a cycle's scored `symbols` and their `scores`
+    symbols = np.asarray(symbols)
+    scores = np.asarray(scores, dtype=np.float64)
+    row = {"Cycle": int(cycle), "Timestamp": timestamp, "Exchange": exchange, "Symbols": len(scores),
+           "Above": int((scores > 0).sum()), "Below": int((scores < 0).sum())}
+    if len(scores):
+        row["Mean"] = scores.mean()
+        row["Median"] = np.median(scores)
+        row.update(zip(QUANTILES, np.quantile(scores, list(QUANTILES.values()))))
+    else:
+        row.update(dict.fromkeys(["Mean", "Median", *QUANTILES], np.nan))
+    # Best first and worst first; ties keep the job's symbol order
+    row["Top"] = encode(symbols[np.argsort(-scores, kind='stable')[:top]])
+    row["Bottom"] = encode(symbols[np.argsort(scores, kind='stable')[:top]])
+    return row
+
+def encode(symbols):
+    # Space-separated registry ids; a symbol missing from the registry is written by name
+    return " ".join(str(i) if i >= 0 else symbol for symbol, i in zip(symbols, symbol_ids(symbols)))
+
+def decode(value):
+    # The symbols of a Top or Bottom cell, best or worst first
+    if not isinstance(value, str):
+        return []
+    return [SYMBOLS[int(token)] if token.isdigit() else token for token in value.split()]
+
+class SummaryTable:
+    """Per-cycle cross-sectional summary of the momentum scores, one CSV row per cycle and exchange.
+
+    maryfetch's merger appends a row as it writes each cycle: how many symbols were scored, their
+    Mean (the cycle's Average Momentum), Median and quantiles, breadth (how many scored Above and
+    Below zero) and the TOP_N highest and lowest symbols as space-separated marysymbols ids, best
+    and worst first (decode() turns them back into names).
+    Dashboards read these few rows instead of aggregating every score of every cycle; reads go
+    through a CsvTail, so a refresh only parses the rows appended since the last one. The tail
+    keeps `slack` beyond `window`, so a reader asking for exactly the last `window` is covered.
+    """
+
+    def __init__(self, path, window=timedelta(hours=24), slack=timedelta(minutes=5)):
+        self.path = path
+        self.window = window
+        self.slack = slack
+        self.tail = CsvTail(path, window + slack if window is not None else None, dtype={'Top': str, 'Bottom': str})
+
+    def append(self, df):
+        # One write() on an O_APPEND descriptor, header included when the file is new
+        data = df[SUMMARY_COLUMNS].to_csv(header=not os.path.exists(self.path), index=False).encode()
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+
+    def trim(self, before):
+        # Drop the rows older than `before`; only the merger writes the file, and it is what runs this
+        if not os.path.exists(self.path):
+            return 0
+        df = pd.read_csv(self.path, dtype=str, keep_default_na=False)
+        old = pd.to_datetime(df['Timestamp'], utc=True, format='ISO8601') < before
+        if old.any():
+            df[~old].to_csv(f"{self.path}.tmp", index=False)
+            os.replace(f"{self.path}.tmp", self.path)
+        return int(old.sum())
+
+    def first_timestamp(self):
+        # Timestamp of the oldest row in the file, without reading the rest of it
+        try:
+            with open(self.path) as f:
+                header = f.readline().rstrip("\n").split(",")
+                line = f.readline()
+        except FileNotFoundError:
+            return None
+        if not line.endswith("\n"):
+            return None
+        return pd.Timestamp(line.split(",")[header.index("Timestamp")])
+
+    def covers(self, start):
+        # Whether every cycle since `start` has its row among those the tail keeps. The file has to
+        # start by then, give or take `slack` since cycles land on their own boundaries, and `start`
+        # may be up to `slack` older than the window, as callers take the time before this does.
+        start = pd.Timestamp(start)
+        first = self.first_timestamp()
+        if first is None or first > start + self.slack:
+            return False
+        return self.window is None or start >= pd.Timestamp.now(tz='UTC') - self.window - self.slack
+
+    def read(self, start=None, end=None, exchange=None):
+        df = self.tail.read()
+        if df is None:
+            return pd.DataFrame(columns=SUMMARY_COLUMNS)
+        keep = pd.Series(True, index=df.index)
+        if start is not None:
+            keep &= df['Timestamp'] >= pd.Timestamp(start)
+        if end is not None:
+            keep &= df['Timestamp'] < pd.Timestamp(end)
+        if exchange is not None:
+            keep &= df['Exchange'] == exchange
+        return df[keep]
+
+    def latest(self, exchange=None):
+        # The newest cycle's row, or None
+        df = self.read(exchange=exchange)
+        return df.iloc[-1] if len(df) else None
+
+    def cycle_averages(self, start=None, end=None, exchange=None):
+        # Same shape as the stores' cycle_averages, so ScorePyramid can read market averages from here
+        df = self.read(start, end, exchange)
+        return pd.DataFrame({'Timestamp': df['Timestamp'], 'Momentum Score': df['Mean'].astype(float)})
@@ -0,0 +1,70 @@
+import pandas as pd
+from datetime import timedelta
+import threading
+import logging
+import io
+import os
+
+class CsvTail:
+    """Incrementally parsed view of an append-only CSV such as momentum_scores.csv.
+
+    Remembers the byte offset it has parsed up to, parses only the lines appended since the
+    last read(), and drops rows older than `window`. If the file is replaced (new inode or
+    rewritten header) or shrinks, it starts over from the top. Thread-safe, so one instance
+    can serve every dashboard session. `dtype` is passed on to read_csv; categorical columns
+    need fixed categories, so every chunk agrees on them. `convert`, if given, is applied to
+    each parsed chunk before it joins the rows already read.
+    """
+
+    def __init__(self, path, window=timedelta(hours=24), time_column='Timestamp', dtype=None, convert=None):
+        self.path = path
+        self.window = window
+        self.time_column = time_column
+        self.dtype = dtype
+        self.convert = convert
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.inode = None
+        self.header = b""
+        self.offset = 0
+        self.df = None
+
+    def read(self):
+        # The rows within the window, or None while the file is missing or has no header yet
+        with self.lock:
+            try:
+                with open(self.path, 'rb') as f:
+                    stat = os.fstat(f.fileno())
+                    header = f.readline()
+                    if not header.endswith(b"\n"):
+                        self.reset()
+                        return None
+                    if stat.st_ino != self.inode or header != self.header or stat.st_size < self.offset:
+                        if self.inode is not None:
+                            logging.info(f"{self.path} was rotated or rewritten, reading it again")
+                        self.reset()
+                        self.inode, self.header, self.offset = stat.st_ino, header, len(header)
+                    f.seek(self.offset)
+                    new = f.read()
+            except FileNotFoundError:
+                self.reset()
+                return None
+
+            # A line still being written is left for the next read
+            new = new[:new.rfind(b"\n") + 1]
+            self.offset += len(new)
+            if new or self.df is None:
+                chunk = pd.read_csv(io.BytesIO(self.header + new), dtype=self.dtype)
+                chunk[self.time_column] = pd.to_datetime(chunk[self.time_column], utc=True, format='ISO8601')
+                if self.convert is not None:
+                    chunk = self.convert(chunk)
+                self.df = chunk if self.df is None or self.df.empty else pd.concat([self.df, chunk], ignore_index=True)
+
+            # Rows are appended in time order, so the first row tells whether any have aged out
+            if self.window is not None and len(self.df):
+                cutoff = pd.Timestamp.now(tz='UTC') - self.window
+                if self.df[self.time_column].iloc[0] < cutoff:
+                    self.df = self.df[self.df[self.time_column] >= cutoff].reset_index(drop=True)
+            return self.df.copy(deep=False)
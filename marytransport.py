@@ -0,0 +1,73 @@
+from tradingview_ta import TradingView, __version__ as tradingview_ta_version
+from tradingview_ta.main import calculate
+from requests.adapters import HTTPAdapter
+import threading
+import requests
+
+class ScannerTransport:
+    """Pooled keep-alive transport for TradingView scanner requests.
+
+    Drop-in for TA_Handler.get_analysis and tradingview_ta.get_multiple_analysis, but every
+    request goes through one shared requests.Session, so TCP/TLS connections are reused
+    across calls and threads and responses are gzip-compressed. Point `base_url` at a local
+    HTTP stand-in to test without TradingView.
+    """
+
+    def __init__(self, pool_size=10, base_url=TradingView.scan_url):
+        self.base_url = base_url
+        self.adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session = requests.Session()
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+        self.session.headers.update({
+            "User-Agent": f"tradingview_ta/{tradingview_ta_version}",
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        })
+        self.lock = threading.Lock()
+        self.requests_sent = 0
+
+    def scan(self, screener, tickers, interval, indicators, timeout=None):
+        data = TradingView.data(tickers, interval, indicators)
+        with self.lock:
+            self.requests_sent += 1
+        response = self.session.post(f"{self.base_url}{screener.lower()}/scan", json=data, timeout=timeout)
+        # Same wording as tradingview_ta, so callers can still spot 429s in the message
+        if response.status_code != 200:
+            raise Exception("Can't access TradingView's API. HTTP status code: {}. Check for invalid symbol, exchange, or indicators.".format(
+                response.status_code))
+        return response.json()["data"]
+
+    def get_analysis(self, screener, exchange, symbol, interval, timeout=None):
+        indicators_key = TradingView.indicators.copy()
+        result = self.scan(screener, [f"{exchange}:{symbol}"], interval, indicators_key, timeout)
+        if not result:
+            raise Exception("Exchange or symbol not found.")
+        indicators = dict(zip(indicators_key, result[0]["d"]))
+        return calculate(indicators=indicators, indicators_key=indicators_key, screener=screener,
+                         symbol=symbol, exchange=exchange, interval=interval)
+
+    def get_multiple_analysis(self, screener, interval, symbols, timeout=None):
+        # {"EXCHANGE:SYMBOL": Analysis or None}, like tradingview_ta.get_multiple_analysis
+        indicators_key = TradingView.indicators.copy()
+        final = {}
+        for row in self.scan(screener, symbols, interval, indicators_key, timeout):
+            exchange, symbol = row["s"].split(":")
+            final[row["s"]] = calculate(indicators=dict(zip(indicators_key, row["d"])), indicators_key=indicators_key,
+                                        screener=screener, symbol=symbol, exchange=exchange, interval=interval)
+        for symbol in symbols:
+            final.setdefault(symbol.upper(), None)
+        return final
+
+    def connections_opened(self):
+        pools = self.adapter.poolmanager.pools
+        return sum(pools[key].num_connections for key in list(pools.keys()))
+
+    def reuse_ratio(self):
+        # Share of requests that went out over an already open connection
+        if not self.requests_sent:
+            return 0.0
+        return max(0.0, 1 - self.connections_opened() / self.requests_sent)
+
+    def close(self):
+        self.session.close()
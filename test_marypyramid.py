@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+from marystore import PartitionedStore
+from maryarchive import Archive, archive_store, roll_store
+from marypyramid import ScorePyramid
+
+SYMBOLS = ["BTCUSDT.P", "ETHUSDT.P"]
+
+def fill_store(store, start, end):
+    timestamps = pd.date_range(start, end, freq="1min", inclusive="left")
+    scores = np.random.default_rng(0).integers(-10, 11, len(timestamps) * len(SYMBOLS)) / 10
+    df = pd.DataFrame({
+        "Symbol": np.tile(SYMBOLS, len(timestamps)),
+        "Momentum Score": scores,
+        "Timestamp": np.repeat(timestamps, len(SYMBOLS)),
+        "Exchange": "BYBIT",
+        "Cycle": np.repeat(timestamps.asi8 // 10**6, len(SYMBOLS)),
+    })
+    df["Average Momentum"] = df.groupby("Timestamp")["Momentum Score"].transform("mean")
+    store.write(df, True)
+
+def test_recent_ranges_stay_raw_before_any_rows_are_archived(tmp_path):
+    now = pd.Timestamp.now(tz="UTC").floor("min")
+    store, archive = PartitionedStore(str(tmp_path / "store")), Archive(str(tmp_path / "archive"))
+    fill_store(store, now - timedelta(days=2), now)
+    # Bars are rolled up every hour, long before any raw row ages out
+    roll_store(store, archive, now.floor("h") - timedelta(days=2), now.floor("h"))
+    pyramid = ScorePyramid(store, archive)
+    for hours in (1, 6):
+        level, df = pyramid.series("BTCUSDT.P", now - timedelta(hours=hours), now)
+        assert level == "raw"
+        assert len(df) == hours * 60
+
+def test_ranges_reaching_into_the_archive(tmp_path):
+    now = pd.Timestamp.now(tz="UTC").floor("h")
+    store, archive = PartitionedStore(str(tmp_path / "store")), Archive(str(tmp_path / "archive"))
+    fill_store(store, now - timedelta(days=3), now)
+    archive_store(store, archive, now - timedelta(days=1))
+    roll_store(store, archive, now - timedelta(days=1), now)
+    pyramid = ScorePyramid(store, archive)
+    level, df = pyramid.series("BTCUSDT.P", now - timedelta(hours=6), now)
+    assert level == "raw" and len(df) == 6 * 60
+    level, df = pyramid.series("BTCUSDT.P", now - timedelta(days=2), now)
+    assert level == "5m" and len(df) == 2 * 24 * 12
@@ -0,0 +1,35 @@
+from tradingview_ta import Interval
+from maryschedule import PriorityScheduler, bar_open
+
+INTERVAL = Interval.INTERVAL_1_DAY
+SYMBOLS = [f"S{i}USDT.P" for i in range(50)]
+
+def scheduler():
+    return PriorityScheduler({INTERVAL: 1800}, hot_share=0.2, hot_scale=1.0, cold_scale=3.0)
+
+def test_missing_symbol_does_not_make_the_others_due():
+    start = bar_open(INTERVAL, 1_700_000_000) + 3600
+    schedule = scheduler()
+    for symbol in SYMBOLS[1:]:
+        schedule.store(symbol, INTERVAL, object(), start)
+    assert schedule.due(SYMBOLS, [INTERVAL], start + 60) == [(SYMBOLS[0], INTERVAL)]
+
+def test_symbol_that_never_comes_back_is_retried_alone():
+    start = bar_open(INTERVAL, 1_700_000_000) + 3600
+    schedule = scheduler()
+    for symbol in SYMBOLS:
+        schedule.store(symbol, INTERVAL, object(), start)
+    # The cold budget runs out for everyone, but the first symbol's rating never arrives
+    now = start + 3 * 1800
+    assert len(schedule.due(SYMBOLS, [INTERVAL], now)) == len(SYMBOLS)
+    for symbol in SYMBOLS[1:]:
+        schedule.store(symbol, INTERVAL, object(), now)
+    assert schedule.due(SYMBOLS, [INTERVAL], now + 60) == [(SYMBOLS[0], INTERVAL)]
+
+def test_held_rating_expires_once_its_refetches_have_failed_too_long():
+    start = bar_open(INTERVAL, 1_700_000_000) + 3600
+    schedule = PriorityScheduler({INTERVAL: 1800}, cold_scale=3.0, max_age=900)
+    rating = object()
+    schedule.store(SYMBOLS[0], INTERVAL, rating, start)
+    assert schedule.freshest(SYMBOLS[0], INTERVAL, start + 3 * 1800 + 900) is rating
+    assert schedule.freshest(SYMBOLS[0], INTERVAL, start + 3 * 1800 + 901) is None
@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+from marysummary import SummaryTable, summarize, decode
+
+def write_summaries(path, start, end):
+    table = SummaryTable(path)
+    rows = [summarize(int(timestamp.timestamp()), timestamp, "BYBIT", ["BTCUSDT.P", "ETHUSDT.P"], [0.5, -0.2])
+            for timestamp in pd.date_range(start, end, freq="1min")]
+    table.append(pd.DataFrame(rows))
+    return table
+
+def test_covers_the_last_window_exactly(tmp_path):
+    now = pd.Timestamp.now(tz="UTC").floor("min")
+    table = write_summaries(tmp_path / "summary.csv", now - timedelta(days=2), now)
+    start = pd.Timestamp.now(tz="UTC") - timedelta(hours=24)
+    assert table.covers(start)
+    assert table.read(start=start)['Timestamp'].min() - start < timedelta(minutes=1)
+    assert not table.covers(start - timedelta(hours=1))
+
+def test_does_not_cover_before_the_file_starts(tmp_path):
+    now = pd.Timestamp.now(tz="UTC").floor("min")
+    table = write_summaries(tmp_path / "summary.csv", now - timedelta(hours=1), now)
+    assert not table.covers(pd.Timestamp.now(tz="UTC") - timedelta(hours=24))
+    assert table.covers(now - timedelta(minutes=30))
+
+def test_top_and_bottom_round_trip():
+    row = summarize(0, pd.Timestamp(0, tz="UTC"), "BYBIT", np.array(["BTCUSDT.P", "ETHUSDT.P", "NEWUSDT.P"]), [0.5, -0.2, 0.1])
+    assert decode(row["Top"]) == ["BTCUSDT.P", "NEWUSDT.P", "ETHUSDT.P"]
+    assert decode(row["Bottom"]) == ["ETHUSDT.P", "NEWUSDT.P", "BTCUSDT.P"]
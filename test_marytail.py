@@ -0,0 +1,15 @@
+import pandas as pd
+from marysymbols import SCORE_DTYPES, compact
+from marytail import CsvTail
+
+def test_unregistered_symbol_keeps_its_name(tmp_path):
+    path = tmp_path / "momentum_scores.csv"
+    now = pd.Timestamp.now(tz='UTC')
+    rows = pd.DataFrame({'Timestamp': [now.isoformat()] * 2, 'Symbol': ["BTCUSDT.P", "NEWUSDT.P"],
+                         'Momentum Score': [1.0, -1.0], 'Average Momentum': [0.0, 0.0]})
+    rows.to_csv(path, index=False)
+    tail = CsvTail(path, dtype=SCORE_DTYPES, convert=compact)
+    assert list(tail.read()['Symbol']) == ["BTCUSDT.P", "NEWUSDT.P"]
+    # A later chunk of registered symbols only still joins the earlier rows
+    rows.iloc[:1].to_csv(path, mode='a', header=False, index=False)
+    assert list(compact(tail.read())['Symbol']) == ["BTCUSDT.P", "NEWUSDT.P", "BTCUSDT.P"]
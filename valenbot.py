@@ -2,20 +2,40 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 from scipy.stats import pearsonr
-from tradingview_ta import TA_Handler, Interval
+from tradingview_ta import Interval, Analysis
 import csv
 import altair as alt
+from marycache import PersistentCache
+from marytransport import ScannerTransport
+
+# Keep-alive connection pool reused by every fetch
+transport = ScannerTransport()
+
+# On-disk cache shared with the maryfetch processes; valenbot keeps whole indicator dicts
+cache = PersistentCache("fetch_cache.sqlite", ttl=300, table="indicators")
 
 # Function to fetch data using TradingView TA Handler
 def fetch_all_data(symbol, exchange, screener, interval):
-    handler = TA_Handler(
-        symbol=symbol,
-        exchange=exchange,
+    cache_key = f"{symbol}_{exchange}_{screener}_{interval}"
+    indicators = cache.get(cache_key)
+    if indicators is not None:
+        analysis = Analysis()
+        analysis.symbol = symbol
+        analysis.exchange = exchange
+        analysis.screener = screener
+        analysis.interval = interval
+        analysis.indicators = indicators
+        return analysis
+
+    analysis = transport.get_analysis(
         screener=screener,
+        exchange=exchange,
+        symbol=symbol,
         interval=interval,
         timeout=None
     )
-    analysis = handler.get_analysis()
+    if analysis is not None:
+        cache.set(cache_key, analysis.indicators)
     return analysis
 
 # Function to calculate True Range (TR)